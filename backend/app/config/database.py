@@ -1,16 +1,227 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from app.config.settings import settings
+from app.utils.metrics import DB_POOL_CHECKED_OUT, DB_POOL_SIZE, DB_POOL_TIMEOUTS, DB_POOL_WAIT
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+class PoolStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.hold_seconds_total = 0.0
+        self.hold_seconds_max = 0.0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    def attach(self, engine):
+        self.pool = engine.sync_engine.pool
+        if isinstance(self.pool, QueuePool):
+            DB_POOL_SIZE.labels(self.name).set(self.pool.size())
+        event.listen(engine.sync_engine, "checkout", self.on_checkout)
+        event.listen(engine.sync_engine, "checkin", self.on_checkin)
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checkout_time"] = time.perf_counter()
+        with self._lock:
+            self.checkouts += 1
+        DB_POOL_CHECKED_OUT.labels(self.name).inc()
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop("checkout_time", None)
+        if started is None:
+            return
+        held = time.perf_counter() - started
+        DB_POOL_CHECKED_OUT.labels(self.name).dec()
+        with self._lock:
+            self.checkins += 1
+            self.hold_seconds_total += held
+            self.hold_seconds_max = max(self.hold_seconds_max, held)
+
+    def record_wait(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            if timed_out:
+                self.timeouts += 1
+        DB_POOL_WAIT.labels(self.name).observe(waited)
+        if timed_out:
+            DB_POOL_TIMEOUTS.labels(self.name).inc()
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = {
+                "checkouts": self.checkouts,
+                "checked_out": self.checkouts - self.checkins,
+                "hold_ms_avg": round(self.hold_seconds_total / self.checkins * 1000, 3) if self.checkins else 0.0,
+                "hold_ms_max": round(self.hold_seconds_max * 1000, 3),
+                "wait_ms_avg": round(self.wait_seconds_total / self.waits * 1000, 3) if self.waits else 0.0,
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+                "timeouts": self.timeouts,
+            }
+        if isinstance(self.pool, QueuePool):
+            result.update({
+                "pool_size": self.pool.size(),
+                "pool_checked_in": self.pool.checkedin(),
+                "pool_overflow": self.pool.overflow(),
+            })
+        return result
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    pool_stats = None
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.pool_stats = self.pool_stats
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self.pool_stats is not None:
+                self.pool_stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.pool_stats is not None:
+            self.pool_stats.record_wait(time.perf_counter() - start)
+        return connection
+
+
+def get_async_url(url: str) -> str:
+    parsed = make_url(url)
+    if parsed.drivername in ASYNC_DRIVERS.values():
+        return url
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for database backend '{parsed.get_backend_name()}'")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _create_engine(url: str, stats: PoolStats):
+    url = get_async_url(url)
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if not url.startswith("sqlite"):
+        options.update({
+            "poolclass": TimedQueuePool,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+        })
+    new_engine = create_async_engine(url, **options)
+    if isinstance(new_engine.sync_engine.pool, TimedQueuePool):
+        new_engine.sync_engine.pool.pool_stats = stats
+    stats.attach(new_engine)
+    return new_engine
+
+
+pool_stats = PoolStats("primary")
+replica_pool_stats = PoolStats("replica") if settings.DATABASE_REPLICA_URL else None
+
+# Engines are built on first use, so importing the app does not load the driver or touch the database.
+_engine = None
+_replica_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine(settings.DATABASE_URL, pool_stats)
+    return _engine
+
+
+def get_replica_engine():
+    global _replica_engine
+    if _replica_engine is None and replica_pool_stats is not None:
+        with _engine_lock:
+            if _replica_engine is None:
+                _replica_engine = _create_engine(settings.DATABASE_REPLICA_URL, replica_pool_stats)
+    return _replica_engine
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            replica_pool_stats is not None
+            and self.info.get("use_replica")
+            and not self.info.get("has_writes")
+            and not self._flushing
+        ):
+            return get_replica_engine().sync_engine
+        if self.bind is None:
+            return get_engine().sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_flush_write(session, flush_context):
+    session.info["has_writes"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+SessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False
+)
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
+@contextmanager
+def read_replica(db):
+    previous = db.info.get("use_replica", False)
+    db.info["use_replica"] = True
     try:
         yield db
     finally:
-        db.close()
+        db.info["use_replica"] = previous
+
+
+async def dispose_engines():
+    if _engine is not None:
+        await _engine.dispose()
+    if _replica_engine is not None:
+        await _replica_engine.dispose()
+
+
+def get_pool_stats() -> dict:
+    return {
+        "primary": pool_stats.stats(),
+        "replica": replica_pool_stats.stats() if replica_pool_stats is not None else None,
+    }
+
+
+async def get_db():
+    async with SessionLocal() as db:
+        yield db
@@ -1,9 +1,19 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+import random
 import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from app.config.settings import settings
 
 LOG_DIR = Path(__file__).parent.parent.parent / "logs"
-LOG_DIR.mkdir(exist_ok=True)
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
 
 LOGGING_CONFIG = {
     "version": 1,
@@ -14,9 +24,12 @@ LOGGING_CONFIG = {
             "datefmt": "%Y-%m-%d %H:%M:%S",
         },
         "detailed": {
-            "format": "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s",
+            "format": "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] [%(request_id)s] - %(message)s",
             "datefmt": "%Y-%m-%d %H:%M:%S",
         },
+        "json": {
+            "()": "app.config.logging_config.JsonFormatter",
+        },
     },
     "handlers": {
         "console": {
@@ -55,9 +68,117 @@ LOGGING_CONFIG = {
     },
 }
 
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "module": record.module,
+            "line": record.lineno,
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of DEBUG records from the configured loggers (and their children)."""
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class _QueueHandler(QueueHandler):
+    """Merges the message arguments but keeps the traceback separate for the formatters on the listener thread."""
+
+    _exception_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener = None
+
+
 def setup_logging():
     from logging.config import dictConfig
-    dictConfig(LOGGING_CONFIG)
+    global _listener
+
+    stop_logging()
+    LOG_DIR.mkdir(exist_ok=True)
+    config = dict(LOGGING_CONFIG)
+    if settings.LOG_FORMAT == "json":
+        config["handlers"] = {
+            name: {**handler, "formatter": "json"} for name, handler in LOGGING_CONFIG["handlers"].items()
+        }
+    dictConfig(config)
+
+    app_logger = logging.getLogger("app")
+    root_logger = logging.getLogger()
+    handlers = list(app_logger.handlers)
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    if settings.LOG_SAMPLE_RATES:
+        queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+    for logger in (app_logger, root_logger):
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        logger.addHandler(queue_handler)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
 
 def get_logger(name: str) -> logging.Logger:
     return logging.getLogger(f"app.{name}")
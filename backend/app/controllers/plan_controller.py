@@ -1,112 +1,145 @@
-from fastapi import APIRouter, Depends, status, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, status, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.database import get_db
 from app.services.plan_service import PlanService
 from app.schemas.plan import PlanResponse, PlanCreate, PlanUpdate
 from app.utils.dependencies import get_current_admin_user
+from app.utils.http_cache import cached_json_response
+from app.config.settings import settings
 from app.models.user import User
 from typing import List
 from app.config.logging_config import get_logger
+from app.utils.tracing import TracedRoute
 
 logger = get_logger("plan_controller")
 
-router = APIRouter(prefix="/plans", tags=["Plans"])
+router = APIRouter(prefix="/plans", tags=["Plans"], route_class=TracedRoute)
 
 
 @router.get("/", response_model=List[PlanResponse])
-def get_all_plans(
+async def get_all_plans(
+    request: Request,
     include_deleted: bool = False,
     use_cache: bool = True,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     plan_service = PlanService(db)
-    return plan_service.get_all_plans(include_deleted=include_deleted, use_cache=use_cache)
+    if not use_cache:
+        return await plan_service.get_all_plans(include_deleted=include_deleted, use_cache=False)
+    
+    return await cached_json_response(
+        request,
+        namespace="plans",
+        variant=f"all:include_deleted={include_deleted}",
+        version=await plan_service.get_catalog_version(),
+        render=lambda: plan_service.render_all_plans(include_deleted=include_deleted),
+        max_age=settings.PLAN_CATALOG_MAX_AGE,
+        stale_while_revalidate=settings.PLAN_CATALOG_STALE_WHILE_REVALIDATE
+    )
 
 
 @router.get("/{plan_id}", response_model=PlanResponse)
-def get_plan(
+async def get_plan(
+    request: Request,
     plan_id: int,
     use_cache: bool = True,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     plan_service = PlanService(db)
-    plan = plan_service.get_plan_by_id(plan_id, include_deleted=False, use_cache=use_cache)
-    if not plan:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
-    return plan
+    if not use_cache:
+        plan = await plan_service.get_plan_by_id(plan_id, include_deleted=False, use_cache=False)
+        if not plan:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
+        return plan
+    
+    async def render():
+        body = await plan_service.render_plan(plan_id)
+        if body is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
+        return body
+    
+    return await cached_json_response(
+        request,
+        namespace="plans",
+        variant=f"id:{plan_id}",
+        version=await plan_service.get_catalog_version(),
+        render=render,
+        max_age=settings.PLAN_CATALOG_MAX_AGE,
+        stale_while_revalidate=settings.PLAN_CATALOG_STALE_WHILE_REVALIDATE
+    )
 
 
 @router.post("/", response_model=PlanResponse, status_code=status.HTTP_201_CREATED)
-def create_plan(
+async def create_plan(
     plan_data: PlanCreate,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    logger.info(f"Admin {current_user.username} creating plan: {plan_data.name}")
+    logger.info("Admin %s creating plan: %s", current_user.username, plan_data.name)
     plan_service = PlanService(db)
     
-    existing = plan_service.get_plan_by_name(plan_data.name, include_deleted=True, use_cache=False)
+    existing = await plan_service.get_plan_by_name(plan_data.name, include_deleted=True, use_cache=False)
     if existing:
-        logger.warning(f"Plan creation failed - name already exists: {plan_data.name}")
+        logger.warning("Plan creation failed - name already exists: %s", plan_data.name)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Plan with this name already exists"
         )
     
-    return plan_service.create_plan(plan_data)
+    return await plan_service.create_plan(plan_data)
     return plan
 
 
 @router.put("/{plan_id}", response_model=PlanResponse)
-def update_plan(
+async def update_plan(
     plan_id: int,
     plan_data: PlanUpdate,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    logger.info(f"Admin {current_user.username} updating plan {plan_id}")
+    logger.info("Admin %s updating plan %s", current_user.username, plan_id)
     plan_service = PlanService(db)
-    plan = plan_service.get_plan_by_id(plan_id, include_deleted=False, use_cache=False)
+    plan = await plan_service.get_plan_by_id(plan_id, include_deleted=False, use_cache=False)
     
     if not plan:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
     
     if plan_data.name and plan_data.name != plan.name:
-        existing = plan_service.get_plan_by_name(plan_data.name, include_deleted=True, use_cache=False)
+        existing = await plan_service.get_plan_by_name(plan_data.name, include_deleted=True, use_cache=False)
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Plan with this name already exists"
             )
     
-    return plan_service.update_plan(plan_id, plan_data)
+    return await plan_service.update_plan(plan_id, plan_data)
 
 
 @router.delete("/{plan_id}/soft", response_model=PlanResponse)
-def soft_delete_plan(
+async def soft_delete_plan(
     plan_id: int,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    logger.info(f"Admin {current_user.username} soft deleting plan {plan_id}")
+    logger.info("Admin %s soft deleting plan %s", current_user.username, plan_id)
     plan_service = PlanService(db)
-    plan = plan_service.get_plan_by_id(plan_id, include_deleted=False, use_cache=False)
+    plan = await plan_service.get_plan_by_id(plan_id, include_deleted=False, use_cache=False)
     
     if not plan:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
     
-    return plan_service.soft_delete_plan(plan_id)
+    return await plan_service.soft_delete_plan(plan_id)
 
 
 @router.post("/{plan_id}/restore", response_model=PlanResponse)
-def restore_plan(
+async def restore_plan(
     plan_id: int,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    logger.info(f"Admin {current_user.username} restoring plan {plan_id}")
+    logger.info("Admin %s restoring plan %s", current_user.username, plan_id)
     plan_service = PlanService(db)
-    plan = plan_service.get_plan_by_id(plan_id, include_deleted=True, use_cache=False)
+    plan = await plan_service.get_plan_by_id(plan_id, include_deleted=True, use_cache=False)
     
     if not plan:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
@@ -117,24 +150,24 @@ def restore_plan(
             detail="Plan is not deleted"
         )
     
-    return plan_service.restore_plan(plan_id)
+    return await plan_service.restore_plan(plan_id)
 
 
 @router.delete("/{plan_id}/hard", status_code=status.HTTP_204_NO_CONTENT)
-def hard_delete_plan(
+async def hard_delete_plan(
     plan_id: int,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    logger.warning(f"Admin {current_user.username} hard deleting plan {plan_id}")
+    logger.warning("Admin %s hard deleting plan %s", current_user.username, plan_id)
     plan_service = PlanService(db)
-    plan = plan_service.get_plan_by_id(plan_id, include_deleted=True, use_cache=False)
+    plan = await plan_service.get_plan_by_id(plan_id, include_deleted=True, use_cache=False)
     
     if not plan:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plan not found")
     
     try:
-        plan_service.hard_delete_plan(plan_id)
+        await plan_service.hard_delete_plan(plan_id)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
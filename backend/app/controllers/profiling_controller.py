@@ -0,0 +1,42 @@
+import io
+import pstats
+import re
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse, PlainTextResponse
+from app.utils.dependencies import get_current_admin_user
+from app.utils.profiling import list_profiles, profile_path
+from app.models.user import User
+from app.config.logging_config import get_logger
+from app.utils.tracing import TracedRoute
+
+logger = get_logger("profiling_controller")
+
+router = APIRouter(prefix="/admin/profiles", tags=["Admin"], route_class=TracedRoute)
+
+_PROFILE_ID = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{8}$")
+
+
+@router.get("/")
+async def get_profiles(current_user: User = Depends(get_current_admin_user)):
+    return list_profiles()
+
+
+@router.get("/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = "raw",
+    limit: int = 50,
+    current_user: User = Depends(get_current_admin_user)
+):
+    path = profile_path(profile_id) if _PROFILE_ID.match(profile_id) else None
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    logger.info("Admin %s downloading profile %s", current_user.username, profile_id)
+
+    if path.suffix == ".collapsed":
+        return PlainTextResponse(path.read_text())
+    if format == "text":
+        output = io.StringIO()
+        pstats.Stats(str(path), stream=output).sort_stats("cumulative").print_stats(limit)
+        return PlainTextResponse(output.getvalue())
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
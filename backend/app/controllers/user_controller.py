@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.database import get_db
 from app.services.user_service import UserService
 from app.schemas.user import UserResponse, UserUpdate, UserWithSubscription
@@ -7,71 +7,73 @@ from app.utils.dependencies import get_current_user, get_current_admin_user
 from app.models.user import User
 from typing import List
 from app.config.logging_config import get_logger
+from app.utils.tracing import TracedRoute
 
 logger = get_logger("user_controller")
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=TracedRoute)
 
 
 @router.get("/me", response_model=UserWithSubscription)
-def get_current_user_info(
+async def get_current_user_info(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     user_service = UserService(db)
-    return user_service.get_user_with_subscription(current_user.id)
+    return await user_service.get_user_with_subscription(current_user.id)
 
 
 @router.put("/me", response_model=UserResponse)
-def update_current_user(
+async def update_current_user(
     user_data: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     user_service = UserService(db)
-    return user_service.update_user(current_user.id, user_data)
+    return await user_service.update_user(current_user.id, user_data)
 
 
 @router.get("/", response_model=List[UserWithSubscription])
-def get_all_users(
+async def get_all_users(
     skip: int = 0,
     limit: int = 100,
+    use_cache: bool = True,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     user_service = UserService(db)
-    return user_service.get_all_users_with_subscription(skip, limit)
+    return await user_service.get_all_users_with_subscription(skip, limit, use_cache=use_cache)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(
+async def get_user(
     user_id: int,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     user_service = UserService(db)
-    return user_service.get_user_by_id(user_id)
+    return await user_service.get_user_by_id(user_id)
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user(
+async def update_user(
     user_id: int,
     user_data: UserUpdate,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     user_service = UserService(db)
-    return user_service.update_user(user_id, user_data)
+    return await user_service.update_user(user_id, user_data)
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(
+async def delete_user(
     user_id: int,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    logger.info(f"Admin {current_user.username} deleting user {user_id}")
+    logger.info("Admin %s deleting user %s", current_user.username, user_id)
     user_service = UserService(db)
-    user_service.delete_user(user_id)
+    await user_service.delete_user(user_id)
     user_service = UserService(db)
-    user_service.delete_user(user_id)
+    await user_service.delete_user(user_id)
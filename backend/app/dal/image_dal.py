@@ -1,28 +1,35 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.image_record import ImageRecord
 from typing import Optional
+from datetime import datetime
+from app.utils.tracing import trace_methods
 
 
+@trace_methods
 class ImageDAL:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_by_id(self, image_id: int) -> Optional[ImageRecord]:
-        return self.db.query(ImageRecord).filter(ImageRecord.id == image_id).first()
+    async def get_by_id(self, image_id: int) -> Optional[ImageRecord]:
+        return await self.db.scalar(select(ImageRecord).where(ImageRecord.id == image_id).limit(1))
 
-    def get_all_by_user_id(self, user_id: int, skip: int = 0, limit: int = 50) -> list[ImageRecord]:
-        return self.db.query(ImageRecord).filter(
-            ImageRecord.user_id == user_id
-        ).order_by(ImageRecord.created_at.desc()).offset(skip).limit(limit).all()
+    async def get_all_by_user_id(self, user_id: int, skip: int = 0, limit: int = 50) -> list[ImageRecord]:
+        result = await self.db.scalars(
+            select(ImageRecord).where(
+                ImageRecord.user_id == user_id
+            ).order_by(ImageRecord.created_at.desc()).offset(skip).limit(limit)
+        )
+        return list(result.all())
 
-    def create(
+    async def create(
         self,
         user_id: int,
         filename: str,
         operation: str,
         original_size: str = None,
         processed_size: str = None,
-        image_data: bytes = None
+        image_data: Optional[bytes | memoryview] = None
     ) -> ImageRecord:
         image_record = ImageRecord(
             user_id=user_id,
@@ -33,20 +40,31 @@ class ImageDAL:
             image_data=image_data
         )
         self.db.add(image_record)
-        self.db.commit()
-        self.db.refresh(image_record)
+        await self.db.commit()
+        # Only created_at is generated by the database; a full refresh would read image_data back.
+        await self.db.refresh(image_record, ["created_at"])
         return image_record
 
-    def delete(self, image_record: ImageRecord) -> None:
-        self.db.delete(image_record)
-        self.db.commit()
+    async def delete(self, image_record: ImageRecord) -> None:
+        await self.db.delete(image_record)
+        await self.db.commit()
 
-    def delete_by_id(self, image_id: int) -> bool:
-        image_record = self.get_by_id(image_id)
+    async def delete_by_id(self, image_id: int) -> bool:
+        image_record = await self.get_by_id(image_id)
         if image_record:
-            self.delete(image_record)
+            await self.delete(image_record)
             return True
         return False
 
-    def count_by_user_id(self, user_id: int) -> int:
-        return self.db.query(ImageRecord).filter(ImageRecord.user_id == user_id).count()
+    async def count_by_user_id(self, user_id: int) -> int:
+        return await self.db.scalar(
+            select(func.count()).select_from(ImageRecord).where(ImageRecord.user_id == user_id)
+        )
+
+    async def get_recent_user_ids(self, since: datetime, limit: int = 1000) -> list[int]:
+        result = await self.db.scalars(
+            select(ImageRecord.user_id).where(
+                ImageRecord.created_at >= since
+            ).group_by(ImageRecord.user_id).order_by(func.max(ImageRecord.created_at).desc()).limit(limit)
+        )
+        return list(result.all())
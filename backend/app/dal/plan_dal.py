@@ -1,32 +1,36 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.plan import Plan
 from typing import Optional
 from datetime import datetime
+from app.utils.tracing import trace_methods
 
 
+@trace_methods
 class PlanDAL:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_by_id(self, plan_id: int, include_deleted: bool = False) -> Optional[Plan]:
-        query = self.db.query(Plan).filter(Plan.id == plan_id)
+    async def get_by_id(self, plan_id: int, include_deleted: bool = False) -> Optional[Plan]:
+        query = select(Plan).where(Plan.id == plan_id)
         if not include_deleted:
-            query = query.filter(Plan.is_deleted == False)
-        return query.first()
+            query = query.where(Plan.is_deleted == False)
+        return await self.db.scalar(query.limit(1))
 
-    def get_by_name(self, name: str, include_deleted: bool = False) -> Optional[Plan]:
-        query = self.db.query(Plan).filter(Plan.name == name)
+    async def get_by_name(self, name: str, include_deleted: bool = False) -> Optional[Plan]:
+        query = select(Plan).where(Plan.name == name)
         if not include_deleted:
-            query = query.filter(Plan.is_deleted == False)
-        return query.first()
+            query = query.where(Plan.is_deleted == False)
+        return await self.db.scalar(query.limit(1))
 
-    def get_all(self, include_deleted: bool = False) -> list[Plan]:
-        query = self.db.query(Plan)
+    async def get_all(self, include_deleted: bool = False) -> list[Plan]:
+        query = select(Plan)
         if not include_deleted:
-            query = query.filter(Plan.is_deleted == False)
-        return query.all()
+            query = query.where(Plan.is_deleted == False)
+        result = await self.db.scalars(query)
+        return list(result.all())
 
-    def create(self, name: str, max_operations: int, price: int, description: str = None) -> Plan:
+    async def create(self, name: str, max_operations: int, price: int, description: str = None) -> Plan:
         plan = Plan(
             name=name,
             max_operations=max_operations,
@@ -35,29 +39,29 @@ class PlanDAL:
             is_deleted=False
         )
         self.db.add(plan)
-        self.db.commit()
-        self.db.refresh(plan)
+        await self.db.commit()
+        await self.db.refresh(plan)
         return plan
 
-    def update(self, plan: Plan) -> Plan:
-        self.db.commit()
-        self.db.refresh(plan)
+    async def update(self, plan: Plan) -> Plan:
+        await self.db.commit()
+        await self.db.refresh(plan)
         return plan
 
-    def soft_delete(self, plan: Plan) -> Plan:
+    async def soft_delete(self, plan: Plan) -> Plan:
         plan.is_deleted = True
         plan.deleted_at = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(plan)
+        await self.db.commit()
+        await self.db.refresh(plan)
         return plan
 
-    def restore(self, plan: Plan) -> Plan:
+    async def restore(self, plan: Plan) -> Plan:
         plan.is_deleted = False
         plan.deleted_at = None
-        self.db.commit()
-        self.db.refresh(plan)
+        await self.db.commit()
+        await self.db.refresh(plan)
         return plan
 
-    def hard_delete(self, plan: Plan) -> None:
-        self.db.delete(plan)
-        self.db.commit()
+    async def hard_delete(self, plan: Plan) -> None:
+        await self.db.delete(plan)
+        await self.db.commit()
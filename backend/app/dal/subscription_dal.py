@@ -1,31 +1,53 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from app.models.subscription import Subscription
 from app.models.plan import Plan
 from typing import Optional
 from datetime import datetime, timedelta
+from app.utils.tracing import trace_methods
 
 
+@trace_methods
 class SubscriptionDAL:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_by_id(self, subscription_id: int) -> Optional[Subscription]:
-        return self.db.query(Subscription).options(joinedload(Subscription.plan)).filter(
-            Subscription.id == subscription_id
-        ).first()
+    async def get_by_id(self, subscription_id: int) -> Optional[Subscription]:
+        return await self.db.scalar(
+            select(Subscription).options(joinedload(Subscription.plan)).where(
+                Subscription.id == subscription_id
+            ).limit(1)
+        )
 
-    def get_active_by_user_id(self, user_id: int) -> Optional[Subscription]:
-        return self.db.query(Subscription).options(joinedload(Subscription.plan)).filter(
-            Subscription.user_id == user_id,
-            Subscription.is_active == True
-        ).first()
+    async def get_active_by_user_id(self, user_id: int) -> Optional[Subscription]:
+        return await self.db.scalar(
+            select(Subscription).options(joinedload(Subscription.plan)).where(
+                Subscription.user_id == user_id,
+                Subscription.is_active == True
+            ).limit(1)
+        )
 
-    def get_all_by_user_id(self, user_id: int) -> list[Subscription]:
-        return self.db.query(Subscription).options(joinedload(Subscription.plan)).filter(
-            Subscription.user_id == user_id
-        ).order_by(Subscription.start_date.desc()).all()
+    async def get_active_by_user_ids(self, user_ids: list[int]) -> dict[int, Subscription]:
+        if not user_ids:
+            return {}
+        subscriptions = await self.db.scalars(
+            select(Subscription).options(joinedload(Subscription.plan)).where(
+                Subscription.user_id.in_(user_ids),
+                Subscription.is_active == True
+            )
+        )
+        return {subscription.user_id: subscription for subscription in subscriptions}
 
-    def create(self, user_id: int, plan_id: int) -> Subscription:
+    async def get_all_by_user_id(self, user_id: int) -> list[Subscription]:
+        result = await self.db.scalars(
+            select(Subscription).options(joinedload(Subscription.plan)).where(
+                Subscription.user_id == user_id
+            ).order_by(Subscription.start_date.desc())
+        )
+        return list(result.all())
+
+    async def create(self, user_id: int, plan_id: int) -> Subscription:
         now = datetime.now()
         subscription = Subscription(
             user_id=user_id,
@@ -35,25 +57,27 @@ class SubscriptionDAL:
             end_date=now + timedelta(days=30)
         )
         self.db.add(subscription)
-        self.db.commit()
-        self.db.refresh(subscription)
+        await self.db.commit()
+        await self.db.refresh(subscription)
         return subscription
 
-    def update(self, subscription: Subscription) -> Subscription:
-        self.db.commit()
-        self.db.refresh(subscription)
+    async def update(self, subscription: Subscription) -> Subscription:
+        await self.db.commit()
+        await self.db.refresh(subscription)
         return subscription
 
-    def increment_operations(self, subscription: Subscription) -> Subscription:
+    async def increment_operations(self, subscription: Subscription) -> Subscription:
         subscription.operations_used += 1
-        return self.update(subscription)
-
-    def deactivate_user_subscriptions(self, user_id: int) -> None:
-        self.db.query(Subscription).filter(
-            Subscription.user_id == user_id,
-            Subscription.is_active == True
-        ).update({"is_active": False, "end_date": datetime.now()})
-        self.db.commit()
+        return await self.update(subscription)
+
+    async def deactivate_user_subscriptions(self, user_id: int) -> None:
+        await self.db.execute(
+            update(Subscription).where(
+                Subscription.user_id == user_id,
+                Subscription.is_active == True
+            ).values(is_active=False, end_date=datetime.now())
+        )
+        await self.db.commit()
 
     def has_operations_remaining(self, subscription: Subscription) -> bool:
         return subscription.operations_used < subscription.plan.max_operations
@@ -1,25 +1,39 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
 from typing import Optional
+from app.utils.tracing import trace_methods
 
 
+@trace_methods
 class UserDAL:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_by_id(self, user_id: int) -> Optional[User]:
-        return self.db.query(User).filter(User.id == user_id).first()
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        return await self.db.scalar(select(User).where(User.id == user_id).limit(1))
 
-    def get_by_email(self, email: str) -> Optional[User]:
-        return self.db.query(User).filter(User.email == email).first()
+    async def get_by_email(self, email: str) -> Optional[User]:
+        return await self.db.scalar(select(User).where(User.email == email).limit(1))
 
-    def get_by_username(self, username: str) -> Optional[User]:
-        return self.db.query(User).filter(User.username == username).first()
+    async def get_by_username(self, username: str) -> Optional[User]:
+        return await self.db.scalar(select(User).where(User.username == username).limit(1))
 
-    def get_all(self, skip: int = 0, limit: int = 100) -> list[User]:
-        return self.db.query(User).offset(skip).limit(limit).all()
+    async def get_by_ids(self, user_ids: list[int]) -> dict[int, User]:
+        if not user_ids:
+            return {}
+        users = await self.db.scalars(select(User).where(User.id.in_(user_ids)))
+        return {user.id: user for user in users.all()}
 
-    def create(self, email: str, username: str, hashed_password: str, role: str = "user") -> User:
+    async def get_all(self, skip: int = 0, limit: int = 100) -> list[User]:
+        result = await self.db.scalars(select(User).offset(skip).limit(limit))
+        return list(result.all())
+
+    async def get_ids(self, skip: int = 0, limit: int = 100) -> list[int]:
+        result = await self.db.scalars(select(User.id).order_by(User.id).offset(skip).limit(limit))
+        return list(result.all())
+
+    async def create(self, email: str, username: str, hashed_password: str, role: str = "user") -> User:
         user = User(
             email=email,
             username=username,
@@ -27,23 +41,23 @@ class UserDAL:
             role=role
         )
         self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        await self.db.commit()
+        await self.db.refresh(user)
         return user
 
-    def update(self, user: User) -> User:
-        self.db.commit()
-        self.db.refresh(user)
+    async def update(self, user: User) -> User:
+        await self.db.commit()
+        await self.db.refresh(user)
         return user
 
-    def delete(self, user: User) -> None:
-        self.db.delete(user)
-        self.db.commit()
+    async def delete(self, user: User) -> None:
+        await self.db.delete(user)
+        await self.db.commit()
 
-    def deactivate(self, user: User) -> User:
+    async def deactivate(self, user: User) -> User:
         user.is_active = False
-        return self.update(user)
+        return await self.update(user)
 
-    def activate(self, user: User) -> User:
+    async def activate(self, user: User) -> User:
         user.is_active = True
-        return self.update(user)
+        return await self.update(user)
@@ -1,19 +1,46 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.controllers import auth_controller, user_controller, subscription_controller, image_controller, plan_controller
-from app.config.logging_config import setup_logging, get_logger
+from fastapi.responses import JSONResponse
+from app.controllers import auth_controller, user_controller, subscription_controller, image_controller, plan_controller, profiling_controller
+from app.config.logging_config import setup_logging, stop_logging, get_logger
+from app.config.database import dispose_engines
+from app.config.settings import settings
+from app.utils.metrics import MetricsMiddleware, render_metrics
+from app.utils.cache import cache_service
+from app.utils.concurrency import ConcurrencyLimitMiddleware
+from app.utils.profiling import ProfilingMiddleware
+from app.utils.query_stats import QueryStatsMiddleware
+from app.utils.readiness import readiness_probe
+from app.utils.request_id import RequestIdMiddleware
+from app.utils.tracing import TracingMiddleware
+from app.services.image_service import start_codec_warmup
+from app.services.warmup_service import start_warmup, warmup_state
 
-setup_logging()
 logger = get_logger("main")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Logging starts here rather than on import: it creates logs/ and starts the QueueListener thread.
+    setup_logging()
+    logger.info("Application starting up")
+    cache_service.connect()
+    if settings.IMAGE_CODEC_WARMUP:
+        start_codec_warmup()
+    start_warmup()
+    yield
+    await dispose_engines()
+    stop_logging()
+
+
 app = FastAPI(
     title="Image Processing API",
     description="MVC-based FastAPI application for image processing with subscription plans",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-logger.info("Application starting up")
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://localhost:3001"],
@@ -21,18 +48,23 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ConcurrencyLimitMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 app.include_router(auth_controller.router, prefix="/api/v1")
 app.include_router(user_controller.router, prefix="/api/v1")
 app.include_router(subscription_controller.router, prefix="/api/v1")
 app.include_router(image_controller.router, prefix="/api/v1")
 app.include_router(plan_controller.router, prefix="/api/v1")
-
-logger.info("All routers registered successfully")
+app.include_router(profiling_controller.router, prefix="/api/v1")
 
 
 @app.get("/")
-def root():
+async def root():
     return {
         "message": "Image Processing API",
         "version": "1.0.0",
@@ -41,5 +73,34 @@ def root():
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
+    # Liveness only: answering proves the event loop is running. Dependencies are checked by /ready.
     return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    if not warmup_state.is_ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "warming_up", "warmup": warmup_state.stats()}
+        )
+    checks = await readiness_probe.check()
+    content = {
+        "status": "ready" if checks["ready"] else "not_ready",
+        "database": checks["database"],
+        "redis": checks["redis"],
+        "redis_breaker": cache_service.breaker.stats(),
+        "warmup": warmup_state.stats(),
+    }
+    if not checks["ready"]:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=content)
+    return content
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
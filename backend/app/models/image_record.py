@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, LargeBinary, TIMESTAMP
+from sqlalchemy import Column, Integer, String, ForeignKey, LargeBinary, TIMESTAMP, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.config.database import Base
@@ -6,6 +6,10 @@ from app.config.database import Base
 
 class ImageRecord(Base):
     __tablename__ = "image_records"
+    __table_args__ = (
+        Index("ix_image_records_user_id_created_at", "user_id", "created_at"),
+        Index("ix_image_records_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
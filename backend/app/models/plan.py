@@ -12,7 +12,7 @@ class Plan(Base):
     max_operations = Column(Integer, nullable=False)
     price = Column(Integer, nullable=False)
     description = Column(Text)
-    is_deleted = Column(Boolean, default=False, nullable=False)
+    is_deleted = Column(Boolean, default=False, nullable=False, index=True)
     deleted_at = Column(TIMESTAMP, nullable=True)
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Boolean, TIMESTAMP
+from sqlalchemy import Column, Integer, ForeignKey, Boolean, TIMESTAMP, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.config.database import Base
@@ -6,6 +6,16 @@ from app.config.database import Base
 
 class Subscription(Base):
     __tablename__ = "subscriptions"
+    __table_args__ = (
+        Index("ix_subscriptions_user_id_is_active", "user_id", "is_active"),
+        Index(
+            "uq_subscriptions_active_user",
+            "user_id",
+            unique=True,
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -16,4 +26,4 @@ class Subscription(Base):
     is_active = Column(Boolean, default=True)
 
     user = relationship("User", back_populates="subscriptions")
-    plan = relationship("Plan", back_populates="subscriptions")
+    plan = relationship("Plan", back_populates="subscriptions", lazy="joined")
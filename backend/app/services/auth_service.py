@@ -1,27 +1,30 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.dal.user_dal import UserDAL
-from app.utils.security import verify_password, create_access_token
+from app.utils.security import verify_password, create_access_token, hash_password, password_needs_rehash
+from app.utils.cache import cache_service
 from fastapi import HTTPException, status
 from datetime import timedelta
 from app.config.settings import settings
 from app.config.logging_config import get_logger
+from app.utils.tracing import trace_methods
 
 logger = get_logger("auth_service")
 
 
+@trace_methods
 class AuthService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.user_dal = UserDAL(db)
 
-    def authenticate_user(self, username: str, password: str):
-        logger.info(f"Authentication attempt for: {username}")
-        user = self.user_dal.get_by_username(username)
+    async def authenticate_user(self, username: str, password: str):
+        logger.info("Authentication attempt for: %s", username)
+        user = await self.user_dal.get_by_username(username)
         if not user:
-            user = self.user_dal.get_by_email(username)
+            user = await self.user_dal.get_by_email(username)
         
-        if not user or not verify_password(password, user.hashed_password):
-            logger.warning(f"Failed authentication for: {username}")
+        if not user or not await verify_password(password, user.hashed_password):
+            logger.warning("Failed authentication for: %s", username)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
@@ -29,20 +32,33 @@ class AuthService:
             )
         
         if not user.is_active:
-            logger.warning(f"Inactive account login attempt: {username}")
+            logger.warning("Inactive account login attempt: %s", username)
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="User account is inactive"
             )
         
-        logger.info(f"User authenticated successfully: {user.username} (ID: {user.id})")
+        if password_needs_rehash(user.hashed_password):
+            await self._rehash_password(user, password)
+        
+        logger.info("User authenticated successfully: %s (ID: %s)", user.username, user.id)
         return user
 
+    async def _rehash_password(self, user, password: str):
+        try:
+            user.hashed_password = await hash_password(password)
+        except HTTPException:
+            logger.warning("Password rehash deferred for user %s (ID: %s): hashing capacity exhausted", user.username, user.id)
+            return
+        await self.user_dal.update(user)
+        await cache_service.delete(f"user:id:{user.id}")
+        logger.info("Password rehashed with cost %s for user: %s (ID: %s)", settings.BCRYPT_ROUNDS, user.username, user.id)
+
     def create_token(self, user):
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
             data={"user_id": user.id, "username": user.username, "role": user.role},
             expires_delta=access_token_expires
         )
-        logger.info(f"Token generated for user: {user.username} (ID: {user.id})")
+        logger.info("Token generated for user: %s (ID: %s)", user.username, user.id)
         return {"access_token": access_token, "token_type": "bearer"}
@@ -1,83 +1,114 @@
-from sqlalchemy.orm import Session
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.dal.image_dal import ImageDAL
 from app.services.subscription_service import SubscriptionService
 from app.schemas.image import ImageOperation
 from PIL import Image, ImageFilter
 import io
 from fastapi import HTTPException, status, UploadFile
-from typing import Optional
+from typing import BinaryIO, Optional
 from app.config.logging_config import get_logger
+from app.config.settings import settings
+from app.config.database import read_replica
+from app.utils.image_memory import MemoryAccount, estimate_peak_bytes
+from app.utils.metrics import IMAGE_PROCESSING_DURATION, megapixel_bucket, record_image_memory, record_image_stages
+from app.utils.stage_timer import StageTimer
+from app.utils.tracing import in_current_context, trace_methods
 
 logger = get_logger("image_service")
 
+_image_executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_PROCESSING_WORKERS,
+    thread_name_prefix="image-processing"
+)
+WARMUP_FORMATS = ("PNG", "JPEG", "WEBP")
 
+
+def warm_up_codecs():
+    """Loads every Pillow format plugin and runs each common codec once, so the first upload does not pay for it."""
+    started = time.perf_counter()
+    Image.init()
+    sample = Image.new("RGB", (8, 8))
+    for image_format in WARMUP_FORMATS:
+        try:
+            buffer = io.BytesIO()
+            sample.save(buffer, format=image_format)
+            buffer.seek(0)
+            Image.open(buffer).load()
+        except Exception as e:
+            logger.warning("Codec warm-up skipped %s: %s", image_format, e)
+    logger.info("Image codecs warmed up in %.1f ms", (time.perf_counter() - started) * 1000)
+
+
+def start_codec_warmup():
+    return _image_executor.submit(warm_up_codecs)
+
+
+@trace_methods
 class ImageService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.image_dal = ImageDAL(db)
         self.subscription_service = SubscriptionService(db)
 
-    def process_image(
+    async def process_image(
         self,
         user_id: int,
         file: UploadFile,
         operation: ImageOperation,
         **kwargs
     ):
-        logger.info(f"Processing image for user {user_id}: {file.filename} - Operation: {operation.value}")
-        self.subscription_service.check_operations_available(user_id)
+        logger.info("Processing image for user %s: %s - Operation: %s", user_id, file.filename, operation.value)
+        timer = StageTimer()
+        memory = MemoryAccount()
+        with timer.stage("quota"):
+            await self.subscription_service.check_operations_available(user_id)
         
         try:
-            image_data = file.file.read()
-            image = Image.open(io.BytesIO(image_data))
-            original_size = f"{image.width}x{image.height}"
-            
-            if operation == ImageOperation.CROP:
-                processed_image = self._crop_image(image, kwargs)
-            elif operation == ImageOperation.GRAYSCALE:
-                processed_image = self._grayscale_image(image)
-            elif operation == ImageOperation.SEPIA:
-                processed_image = self._sepia_image(image)
-            elif operation == ImageOperation.RESIZE:
-                processed_image = self._resize_image(image, kwargs)
-            elif operation == ImageOperation.ROTATE:
-                processed_image = self._rotate_image(image, kwargs)
-            elif operation == ImageOperation.BLUR:
-                processed_image = self._blur_image(image, kwargs)
-            else:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid operation")
+            processed_data, original_size, processed_size = await asyncio.get_running_loop().run_in_executor(
+                _image_executor, in_current_context(self._transform), file.file, operation, kwargs, timer, time.perf_counter(), memory
+            )
             
-            output = io.BytesIO()
-            processed_image.save(output, format=image.format or 'PNG')
-            processed_data = output.getvalue()
-            processed_size = f"{processed_image.width}x{processed_image.height}"
+            with timer.stage("insert"):
+                image_record = await self.image_dal.create(
+                    user_id=user_id,
+                    filename=file.filename,
+                    operation=operation.value,
+                    original_size=original_size,
+                    processed_size=processed_size,
+                    image_data=processed_data
+                )
+            memory.sample()
             
-            image_record = self.image_dal.create(
-                user_id=user_id,
-                filename=file.filename,
-                operation=operation.value,
-                original_size=original_size,
-                processed_size=processed_size,
-                image_data=processed_data
+            with timer.stage("quota"):
+                await self.subscription_service.increment_operation_count(user_id)
+            logger.info("Image processed successfully: %s (%s -> %s)", file.filename, original_size, processed_size)
+            logger.info(
+                "Image processing stages: user=%s operation=%s input=%s bytes=%s %s %s",
+                user_id, operation.value, original_size, file.size, timer.log_fields(), memory.log_fields()
             )
+            record_image_stages(operation.value, timer.stages)
+            record_image_memory(operation.value, memory.predicted, memory.peak_bytes)
             
-            self.subscription_service.increment_operation_count(user_id)
-            logger.info(f"Image processed successfully: {file.filename} ({original_size} -> {processed_size})")
-            
-            return processed_data, file.filename, image_record
+            return processed_data, file.filename, image_record, timer
             
+        except HTTPException:
+            raise
         except Exception as e:
-            logger.error(f"Image processing failed for user {user_id}: {file.filename} - {str(e)}")
+            logger.error("Image processing failed for user %s: %s - %s", user_id, file.filename, e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Image processing failed: {str(e)}"
             )
 
-    def get_user_images(self, user_id: int, skip: int = 0, limit: int = 50):
-        return self.image_dal.get_all_by_user_id(user_id, skip, limit)
+    async def get_user_images(self, user_id: int, skip: int = 0, limit: int = 50):
+        with read_replica(self.db):
+            return await self.image_dal.get_all_by_user_id(user_id, skip, limit)
 
-    def get_image_by_id(self, image_id: int, user_id: int):
-        image = self.image_dal.get_by_id(image_id)
+    async def get_image_by_id(self, image_id: int, user_id: int):
+        image = await self.image_dal.get_by_id(image_id)
         if not image:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
         
@@ -86,6 +117,81 @@ class ImageService:
         
         return image
 
+    def _transform(
+        self,
+        source: BinaryIO,
+        operation: ImageOperation,
+        kwargs: dict,
+        timer: StageTimer,
+        submitted: float,
+        memory: Optional[MemoryAccount] = None
+    ) -> tuple[memoryview, str, str]:
+        """Decodes straight from the upload's spooled file and encodes once into a buffer.
+
+        The returned memoryview is shared by the stored ImageRecord and the response body, so the output is never
+        copied. The decoded image is released before encoding, so it does not stay alive next to the output.
+        """
+        started = time.perf_counter()
+        timer.record("queue", started - submitted)
+        memory = memory if memory is not None else MemoryAccount()
+        with timer.stage("decode"):
+            input_bytes = source.seek(0, io.SEEK_END)
+            source.seek(0)
+            image = Image.open(source)
+            memory.predicted = estimate_peak_bytes(
+                operation, image.width, image.height, image.mode, input_bytes, kwargs
+            )
+            self._check_memory_budget(memory.predicted)
+            image.load()
+        memory.sample()
+        width, height, image_format = image.width, image.height, image.format or 'PNG'
+        original_size = f"{width}x{height}"
+        
+        with timer.stage("transform"):
+            processed_image = self._apply_operation(image, operation, kwargs)
+        memory.sample()
+        if processed_image is not image:
+            image.close()
+        
+        with timer.stage("encode"):
+            output = io.BytesIO()
+            processed_image.save(output, format=image_format)
+        memory.sample()
+        processed_size = f"{processed_image.width}x{processed_image.height}"
+        processed_image.close()
+        if settings.METRICS_ENABLED:
+            IMAGE_PROCESSING_DURATION.labels(
+                operation.value, megapixel_bucket(width, height)
+            ).observe(time.perf_counter() - started)
+        return output.getbuffer(), original_size, processed_size
+
+    @staticmethod
+    def _check_memory_budget(predicted: int):
+        limit = settings.IMAGE_MEMORY_LIMIT_MB * 1048576
+        if limit and predicted > limit:
+            logger.warning(
+                "Rejecting image: predicted peak %.1f MB exceeds %s MB", predicted / 1048576, settings.IMAGE_MEMORY_LIMIT_MB
+            )
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Image too large to process"
+            )
+
+    def _apply_operation(self, image: Image.Image, operation: ImageOperation, kwargs: dict) -> Image.Image:
+        if operation == ImageOperation.CROP:
+            return self._crop_image(image, kwargs)
+        if operation == ImageOperation.GRAYSCALE:
+            return self._grayscale_image(image)
+        if operation == ImageOperation.SEPIA:
+            return self._sepia_image(image)
+        if operation == ImageOperation.RESIZE:
+            return self._resize_image(image, kwargs)
+        if operation == ImageOperation.ROTATE:
+            return self._rotate_image(image, kwargs)
+        if operation == ImageOperation.BLUR:
+            return self._blur_image(image, kwargs)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid operation")
+
     def _crop_image(self, image: Image.Image, kwargs: dict) -> Image.Image:
         x = kwargs.get('x', 0)
         y = kwargs.get('y', 0)
@@ -122,17 +228,17 @@ class ImageService:
         radius = kwargs.get('blur_radius', 5)
         return image.filter(ImageFilter.GaussianBlur(radius))
 
-    def delete_image(self, image_id: int, user_id: int) -> None:
-        logger.info(f"Deleting image {image_id} for user {user_id}")
-        image = self.image_dal.get_by_id(image_id)
+    async def delete_image(self, image_id: int, user_id: int) -> None:
+        logger.info("Deleting image %s for user %s", image_id, user_id)
+        image = await self.image_dal.get_by_id(image_id)
         
         if not image:
-            logger.warning(f"Image deletion failed - not found: {image_id}")
+            logger.warning("Image deletion failed - not found: %s", image_id)
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image record not found")
         
         if image.user_id != user_id:
-            logger.warning(f"Unauthorized image deletion attempt: user {user_id} tried to delete image {image_id}")
+            logger.warning("Unauthorized image deletion attempt: user %s tried to delete image %s", user_id, image_id)
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this image")
         
-        self.image_dal.delete(image)
-        logger.info(f"Image deleted successfully: {image_id}")
+        await self.image_dal.delete(image)
+        logger.info("Image deleted successfully: %s", image_id)
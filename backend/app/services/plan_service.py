@@ -1,91 +1,96 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.dal.plan_dal import PlanDAL
-from app.schemas.plan import PlanCreate, PlanUpdate
+from app.models.plan import Plan
+from app.schemas.plan import PlanCreate, PlanUpdate, PlanResponse
+from pydantic import TypeAdapter
 from app.utils.cache import cache_service
 from app.config.settings import settings
+from app.config.database import read_replica
 from app.config.logging_config import get_logger
 from typing import List, Optional
+from app.utils.tracing import trace_methods
 
 logger = get_logger("plan_service")
 
+plan_list_adapter = TypeAdapter(List[PlanResponse])
+
+@trace_methods
 class PlanService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.plan_dal = PlanDAL(db)
     
-    def get_all_plans(self, include_deleted: bool = False, use_cache: bool = True) -> List:
-        cache_key = "plans"
-        
-        if use_cache:
-            cached = cache_service.get(cache_key)
-            if cached:
-                logger.debug("Returning cached plans")
-                plans = [self._dict_to_plan(p) for p in cached]
-                if not include_deleted:
-                    plans = [p for p in plans if not p.is_deleted]
-                return plans
-        
-        plans = self.plan_dal.get_all(include_deleted=True)
-        
+    async def get_all_plans(self, include_deleted: bool = False, use_cache: bool = True) -> List:
         if use_cache:
-            plans_dict = [self._plan_to_dict(p) for p in plans]
-            cache_service.set(cache_key, plans_dict, ttl=settings.CACHE_TTL_PLANS)
-            logger.debug("Cached all plans")
+            async def load():
+                return [self._plan_to_dict(p) for p in await self.plan_dal.get_all(include_deleted=True)]
+            
+            cached = await cache_service.get_or_compute("plans", load, ttl=settings.CACHE_TTL_PLANS)
+            plans = [self._dict_to_plan(p) for p in cached]
+        else:
+            with read_replica(self.db):
+                plans = await self.plan_dal.get_all(include_deleted=True)
         
         if not include_deleted:
             plans = [p for p in plans if not p.is_deleted]
         
         return plans
     
-    def get_plan_by_id(self, plan_id: int, include_deleted: bool = False, use_cache: bool = True):
-        cache_key = f"plan:id:{plan_id}"
+    async def get_plan_by_id(self, plan_id: int, include_deleted: bool = False, use_cache: bool = True):
+        if not use_cache:
+            return await self.plan_dal.get_by_id(plan_id, include_deleted=include_deleted)
         
-        if use_cache:
-            cached = cache_service.get(cache_key)
-            if cached:
-                logger.debug(f"Returning cached plan {plan_id}")
-                return self._dict_to_plan(cached)
-        
-        plan = self.plan_dal.get_by_id(plan_id, include_deleted=include_deleted)
+        async def load():
+            plan = await self.plan_dal.get_by_id(plan_id, include_deleted=include_deleted)
+            return self._plan_to_dict(plan) if plan else None
         
-        if plan and use_cache:
-            cache_service.set(cache_key, self._plan_to_dict(plan), ttl=settings.CACHE_TTL_PLANS)
-            logger.debug(f"Cached plan {plan_id}")
-        
-        return plan
+        cached = await cache_service.get_or_compute(f"plan:id:{plan_id}", load, ttl=settings.CACHE_TTL_PLANS)
+        return self._dict_to_plan(cached) if cached else None
     
-    def get_plan_by_name(self, name: str, include_deleted: bool = False, use_cache: bool = True):
-        cache_key = f"plan:name:{name}"
+    async def get_plan_by_name(self, name: str, include_deleted: bool = False, use_cache: bool = True):
+        if not use_cache:
+            return await self.plan_dal.get_by_name(name, include_deleted=include_deleted)
         
-        if use_cache:
-            cached = cache_service.get(cache_key)
-            if cached:
-                logger.debug(f"Returning cached plan {name}")
-                return self._dict_to_plan(cached)
-        
-        plan = self.plan_dal.get_by_name(name, include_deleted=include_deleted)
-        
-        if plan and use_cache:
-            cache_service.set(cache_key, self._plan_to_dict(plan), ttl=settings.CACHE_TTL_PLANS)
-            logger.debug(f"Cached plan {name}")
+        async def load():
+            plan = await self.plan_dal.get_by_name(name, include_deleted=include_deleted)
+            return self._plan_to_dict(plan) if plan else None
         
-        return plan
+        cached = await cache_service.get_or_compute(
+            f"plan:name:{name}",
+            load,
+            ttl=settings.CACHE_TTL_PLANS,
+            tags=["plan:name"]
+        )
+        return self._dict_to_plan(cached) if cached else None
     
-    def create_plan(self, plan_data: PlanCreate):
-        logger.info(f"Creating plan: {plan_data.name}")
-        plan = self.plan_dal.create(
+    async def get_catalog_version(self) -> Optional[int]:
+        return await cache_service.get_version("plans")
+    
+    async def render_all_plans(self, include_deleted: bool = False) -> bytes:
+        plans = await self.get_all_plans(include_deleted=include_deleted)
+        return plan_list_adapter.dump_json(plan_list_adapter.validate_python(plans, from_attributes=True))
+    
+    async def render_plan(self, plan_id: int) -> Optional[bytes]:
+        plan = await self.get_plan_by_id(plan_id, include_deleted=False)
+        if not plan:
+            return None
+        return PlanResponse.model_validate(plan).model_dump_json().encode("utf-8")
+    
+    async def create_plan(self, plan_data: PlanCreate):
+        logger.info("Creating plan: %s", plan_data.name)
+        plan = await self.plan_dal.create(
             name=plan_data.name,
             max_operations=plan_data.max_operations,
             price=plan_data.price,
             description=plan_data.description
         )
-        self._invalidate_plan_cache()
-        logger.info(f"Plan created and cache invalidated: {plan.name} (ID: {plan.id})")
+        await self._invalidate_plan_cache()
+        logger.info("Plan created and cache invalidated: %s (ID: %s)", plan.name, plan.id)
         return plan
     
-    def update_plan(self, plan_id: int, plan_data: PlanUpdate):
-        logger.info(f"Updating plan {plan_id}")
-        plan = self.plan_dal.get_by_id(plan_id, include_deleted=False)
+    async def update_plan(self, plan_id: int, plan_data: PlanUpdate):
+        logger.info("Updating plan %s", plan_id)
+        plan = await self.plan_dal.get_by_id(plan_id, include_deleted=False)
         
         if plan_data.name is not None:
             plan.name = plan_data.name
@@ -96,40 +101,42 @@ class PlanService:
         if plan_data.description is not None:
             plan.description = plan_data.description
         
-        updated_plan = self.plan_dal.update(plan)
-        self._invalidate_plan_cache(plan_id)
-        logger.info(f"Plan updated and cache invalidated: {plan_id}")
+        updated_plan = await self.plan_dal.update(plan)
+        await self._invalidate_plan_cache(plan_id)
+        logger.info("Plan updated and cache invalidated: %s", plan_id)
         return updated_plan
     
-    def soft_delete_plan(self, plan_id: int):
-        logger.info(f"Soft deleting plan {plan_id}")
-        plan = self.plan_dal.get_by_id(plan_id, include_deleted=False)
-        deleted_plan = self.plan_dal.soft_delete(plan)
-        self._invalidate_plan_cache(plan_id)
-        logger.info(f"Plan soft deleted and cache invalidated: {plan_id}")
+    async def soft_delete_plan(self, plan_id: int):
+        logger.info("Soft deleting plan %s", plan_id)
+        plan = await self.plan_dal.get_by_id(plan_id, include_deleted=False)
+        deleted_plan = await self.plan_dal.soft_delete(plan)
+        await self._invalidate_plan_cache(plan_id)
+        logger.info("Plan soft deleted and cache invalidated: %s", plan_id)
         return deleted_plan
     
-    def restore_plan(self, plan_id: int):
-        logger.info(f"Restoring plan {plan_id}")
-        plan = self.plan_dal.get_by_id(plan_id, include_deleted=True)
-        restored_plan = self.plan_dal.restore(plan)
-        self._invalidate_plan_cache(plan_id)
-        logger.info(f"Plan restored and cache invalidated: {plan_id}")
+    async def restore_plan(self, plan_id: int):
+        logger.info("Restoring plan %s", plan_id)
+        plan = await self.plan_dal.get_by_id(plan_id, include_deleted=True)
+        restored_plan = await self.plan_dal.restore(plan)
+        await self._invalidate_plan_cache(plan_id)
+        logger.info("Plan restored and cache invalidated: %s", plan_id)
         return restored_plan
     
-    def hard_delete_plan(self, plan_id: int):
-        logger.warning(f"Hard deleting plan {plan_id}")
-        plan = self.plan_dal.get_by_id(plan_id, include_deleted=True)
-        self.plan_dal.hard_delete(plan)
-        self._invalidate_plan_cache(plan_id)
-        logger.info(f"Plan hard deleted and cache invalidated: {plan_id}")
+    async def hard_delete_plan(self, plan_id: int):
+        logger.warning("Hard deleting plan %s", plan_id)
+        plan = await self.plan_dal.get_by_id(plan_id, include_deleted=True)
+        await self.plan_dal.hard_delete(plan)
+        await self._invalidate_plan_cache(plan_id)
+        logger.info("Plan hard deleted and cache invalidated: %s", plan_id)
     
-    def _invalidate_plan_cache(self, plan_id: Optional[int] = None):
-        cache_service.delete("plans")
+    async def _invalidate_plan_cache(self, plan_id: Optional[int] = None):
+        keys = ["plans"]
         if plan_id:
-            cache_service.delete(f"plan:id:{plan_id}")
-        cache_service.delete_pattern("plan:name:*")
-        logger.debug(f"Plan cache invalidated (plan_id={plan_id})")
+            keys.append(f"plan:id:{plan_id}")
+        await cache_service.delete_many(keys)
+        await cache_service.invalidate_tag("plan:name", fallback_pattern="plan:name:*")
+        await cache_service.bump_version("plans")
+        logger.debug("Plan cache invalidated (plan_id=%s)", plan_id)
     
     def _plan_to_dict(self, plan):
         return {
@@ -139,20 +146,9 @@ class PlanService:
             "price": plan.price,
             "description": plan.description,
             "is_deleted": plan.is_deleted,
-            "deleted_at": plan.deleted_at.isoformat() if plan.deleted_at else None,
-            "created_at": plan.created_at.isoformat() if plan.created_at else None
+            "deleted_at": plan.deleted_at,
+            "created_at": plan.created_at
         }
     
     def _dict_to_plan(self, data):
-        from app.models.plan import Plan
-        from datetime import datetime
-        plan = Plan()
-        plan.id = data["id"]
-        plan.name = data["name"]
-        plan.max_operations = data["max_operations"]
-        plan.price = data["price"]
-        plan.description = data["description"]
-        plan.is_deleted = data["is_deleted"]
-        plan.deleted_at = datetime.fromisoformat(data["deleted_at"]) if data.get("deleted_at") else None
-        plan.created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
-        return plan
+        return Plan(**data)
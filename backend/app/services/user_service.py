@@ -1,5 +1,6 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.dal.user_dal import UserDAL
+from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, UserWithSubscription
 from app.dal.subscription_dal import SubscriptionDAL
 from app.dal.plan_dal import PlanDAL
@@ -9,48 +10,56 @@ from typing import Optional
 from app.config.logging_config import get_logger
 from app.utils.cache import cache_service
 from app.config.settings import settings
+from app.config.database import read_replica
+from app.utils.tracing import trace_methods
 
 logger = get_logger("user_service")
 
 
+@trace_methods
 class UserService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.user_dal = UserDAL(db)
         self.subscription_dal = SubscriptionDAL(db)
         self.plan_dal = PlanDAL(db)
 
-    def get_user_by_id(self, user_id: int, use_cache: bool = True):
-        cache_key = f"user:id:{user_id}"
+    async def get_user_by_id(self, user_id: int, use_cache: bool = True):
+        if not use_cache:
+            return await self._load_user(user_id)
         
-        if use_cache:
-            cached = cache_service.get(cache_key)
-            if cached:
-                logger.debug(f"Returning cached user {user_id}")
-                return self._dict_to_user(cached)
+        async def load():
+            return self._user_to_dict(await self._load_user(user_id))
         
-        user = self.user_dal.get_by_id(user_id)
-        if not user:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        cached = await cache_service.get_or_compute(f"user:id:{user_id}", load, ttl=settings.CACHE_TTL_USER)
+        return self._dict_to_user(cached)
+
+    async def get_user_with_subscription(self, user_id: int, use_cache: bool = True) -> UserWithSubscription:
+        if not use_cache:
+            return await self._build_user_with_subscription(user_id, use_cache=False)
         
-        if use_cache:
-            cache_service.set(cache_key, self._user_to_dict(user), ttl=settings.CACHE_TTL_USER)
-            logger.debug(f"Cached user {user_id}")
+        async def load():
+            return (await self._build_user_with_subscription(user_id, use_cache=True)).model_dump()
         
+        cached = await cache_service.get_or_compute(
+            f"user:with_subscription:{user_id}",
+            load,
+            ttl=settings.CACHE_TTL_USER
+        )
+        return UserWithSubscription(**cached)
+
+    async def _load_user(self, user_id: int):
+        user = await self.user_dal.get_by_id(user_id)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         return user
 
-    def get_user_with_subscription(self, user_id: int, use_cache: bool = True) -> UserWithSubscription:
-        cache_key = f"user:with_subscription:{user_id}"
-        
-        if use_cache:
-            cached = cache_service.get(cache_key)
-            if cached:
-                logger.debug(f"Returning cached user with subscription {user_id}")
-                return UserWithSubscription(**cached)
-        
-        user = self.get_user_by_id(user_id, use_cache=use_cache)
-        subscription = self.subscription_dal.get_active_by_user_id(user_id)
-        
+    async def _build_user_with_subscription(self, user_id: int, use_cache: bool) -> UserWithSubscription:
+        user = await self.get_user_by_id(user_id, use_cache=use_cache)
+        subscription = await self.subscription_dal.get_active_by_user_id(user_id)
+        return self._to_user_with_subscription(user, subscription)
+
+    def _to_user_with_subscription(self, user, subscription) -> UserWithSubscription:
         user_data = UserWithSubscription(
             id=user.id,
             email=user.email,
@@ -65,84 +74,78 @@ class UserService:
             user_data.operations_used = subscription.operations_used
             user_data.operations_remaining = subscription.plan.max_operations - subscription.operations_used
         
-        if use_cache:
-            cache_service.set(cache_key, user_data.model_dump(), ttl=settings.CACHE_TTL_USER)
-            logger.debug(f"Cached user with subscription {user_id}")
-        
         return user_data
 
-    def get_all_users(self, skip: int = 0, limit: int = 100):
-        return self.user_dal.get_all(skip, limit)
+    async def get_all_users(self, skip: int = 0, limit: int = 100):
+        with read_replica(self.db):
+            return await self.user_dal.get_all(skip, limit)
     
-    def get_all_users_with_subscription(self, skip: int = 0, limit: int = 100):
-        users = self.user_dal.get_all(skip, limit)
-        result = []
-        
-        for user in users:
-            subscription = self.subscription_dal.get_active_by_user_id(user.id)
-            
-            user_data = UserWithSubscription(
-                id=user.id,
-                email=user.email,
-                username=user.username,
-                role=user.role,
-                is_active=user.is_active,
-                created_at=user.created_at
-            )
-            
-            if subscription:
-                user_data.current_plan = subscription.plan.name
-                user_data.operations_used = subscription.operations_used
-                user_data.operations_remaining = subscription.plan.max_operations - subscription.operations_used
-            
-            result.append(user_data)
-        
-        return result
+    async def get_all_users_with_subscription(self, skip: int = 0, limit: int = 100, use_cache: bool = True):
+        if not use_cache:
+            with read_replica(self.db):
+                users = await self.user_dal.get_all(skip, limit)
+                subscriptions = await self.subscription_dal.get_active_by_user_ids([user.id for user in users])
+            return [self._to_user_with_subscription(user, subscriptions.get(user.id)) for user in users]
+        
+        # The replica only pages the ids; rows written to the shared cache are loaded from the primary.
+        with read_replica(self.db):
+            keys = {f"user:with_subscription:{user_id}": user_id for user_id in await self.user_dal.get_ids(skip, limit)}
+        
+        async def load(missing_keys):
+            fresh_users = await self.user_dal.get_by_ids([keys[key] for key in missing_keys])
+            subscriptions = await self.subscription_dal.get_active_by_user_ids(list(fresh_users))
+            return {
+                f"user:with_subscription:{user.id}": self._to_user_with_subscription(user, subscriptions.get(user.id)).model_dump()
+                for user in fresh_users.values()
+            }
+        
+        cached = await cache_service.get_or_compute_many(list(keys), load, ttl=settings.CACHE_TTL_USER)
+        return [UserWithSubscription(**cached[key]) for key in keys if key in cached]
 
-    def create_user(self, user_data: UserCreate):
-        logger.info(f"Creating new user: {user_data.username} ({user_data.email})")
+    async def create_user(self, user_data: UserCreate):
+        logger.info("Creating new user: %s (%s)", user_data.username, user_data.email)
         
-        if self.user_dal.get_by_email(user_data.email):
-            logger.warning(f"User creation failed - email already exists: {user_data.email}")
+        if await self.user_dal.get_by_email(user_data.email):
+            logger.warning("User creation failed - email already exists: %s", user_data.email)
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
         
-        if self.user_dal.get_by_username(user_data.username):
-            logger.warning(f"User creation failed - username already exists: {user_data.username}")
+        if await self.user_dal.get_by_username(user_data.username):
+            logger.warning("User creation failed - username already exists: %s", user_data.username)
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already taken")
         
-        hashed_pwd = hash_password(user_data.password)
-        user = self.user_dal.create(
+        hashed_pwd = await hash_password(user_data.password)
+        user = await self.user_dal.create(
             email=user_data.email,
             username=user_data.username,
             hashed_password=hashed_pwd,
             role="user"
         )
         
-        free_plan = self.plan_dal.get_by_name("FREE")
+        free_plan = await self.plan_dal.get_by_name("FREE")
         if free_plan:
-            self.subscription_dal.create(user_id=user.id, plan_id=free_plan.id)
-            logger.info(f"User created successfully with FREE plan: {user.username} (ID: {user.id})")
+            await self.subscription_dal.create(user_id=user.id, plan_id=free_plan.id)
+            logger.info("User created successfully with FREE plan: %s (ID: %s)", user.username, user.id)
         else:
-            logger.warning(f"User created without subscription - FREE plan not found: {user.username} (ID: {user.id})")
+            logger.warning("User created without subscription - FREE plan not found: %s (ID: %s)", user.username, user.id)
         
         return user
 
-    def update_user(self, user_id: int, user_data: UserUpdate):
-        user = self.get_user_by_id(user_id)
-        logger.info(f"Updating user: {user.username} (ID: {user_id})")
+    async def update_user(self, user_id: int, user_data: UserUpdate):
+        user = await self.get_user_by_id(user_id, use_cache=False)
+        logger.info("Updating user: %s (ID: %s)", user.username, user_id)
         
         if user_data.email and user_data.email != user.email:
-            if self.user_dal.get_by_email(user_data.email):
+            if await self.user_dal.get_by_email(user_data.email):
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already in use")
             user.email = user_data.email
         
         if user_data.username and user_data.username != user.username:
-            if self.user_dal.get_by_username(user_data.username):
+            if await self.user_dal.get_by_username(user_data.username):
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already taken")
             user.username = user_data.username
         
         if user_data.password:
-            user.hashed_password = hash_password(user_data.password)
+            user.hashed_password = await hash_password(user_data.password)
         
         if user_data.role is not None:
             user.role = user_data.role
@@ -150,31 +153,33 @@ class UserService:
         if user_data.is_active is not None:
             user.is_active = user_data.is_active
         
-        result = self.user_dal.update(user)
-        self._invalidate_user_cache(user_id)
-        logger.info(f"User updated successfully: {user.username} (ID: {user_id})")
+        result = await self.user_dal.update(user)
+        await self._invalidate_user_cache(user_id)
+        logger.info("User updated successfully: %s (ID: %s)", user.username, user_id)
         return result
 
-    def delete_user(self, user_id: int):
-        user = self.get_user_by_id(user_id, use_cache=False)
-        logger.warning(f"Deleting user: {user.username} (ID: {user_id})")
-        self.user_dal.delete(user)
-        self._invalidate_user_cache(user_id)
-        logger.info(f"User deleted: {user.username} (ID: {user_id})")
+    async def delete_user(self, user_id: int):
+        user = await self.get_user_by_id(user_id, use_cache=False)
+        logger.warning("Deleting user: %s (ID: %s)", user.username, user_id)
+        await self.user_dal.delete(user)
+        await self._invalidate_user_cache(user_id)
+        logger.info("User deleted: %s (ID: %s)", user.username, user_id)
 
-    def deactivate_user(self, user_id: int):
-        user = self.get_user_by_id(user_id, use_cache=False)
-        logger.info(f"Deactivating user: {user.username} (ID: {user_id})")
-        result = self.user_dal.deactivate(user)
-        self._invalidate_user_cache(user_id)
-        logger.info(f"User deactivated: {user.username} (ID: {user_id})")
+    async def deactivate_user(self, user_id: int):
+        user = await self.get_user_by_id(user_id, use_cache=False)
+        logger.info("Deactivating user: %s (ID: %s)", user.username, user_id)
+        result = await self.user_dal.deactivate(user)
+        await self._invalidate_user_cache(user_id)
+        logger.info("User deactivated: %s (ID: %s)", user.username, user_id)
         return result
     
-    def _invalidate_user_cache(self, user_id: int):
-        cache_service.delete(f"user:id:{user_id}")
-        cache_service.delete(f"user:with_subscription:{user_id}")
-        cache_service.delete(f"subscription:active:user:{user_id}")
-        logger.debug(f"User cache invalidated for {user_id}")
+    async def _invalidate_user_cache(self, user_id: int):
+        await cache_service.delete_many([
+            f"user:id:{user_id}",
+            f"user:with_subscription:{user_id}",
+            f"subscription:active:user:{user_id}"
+        ])
+        logger.debug("User cache invalidated for %s", user_id)
     
     def _user_to_dict(self, user):
         return {
@@ -184,18 +189,8 @@ class UserService:
             "role": user.role,
             "is_active": user.is_active,
             "hashed_password": user.hashed_password,
-            "created_at": user.created_at.isoformat() if user.created_at else None
+            "created_at": user.created_at
         }
     
     def _dict_to_user(self, data):
-        from app.models.user import User
-        from datetime import datetime
-        user = User()
-        user.id = data["id"]
-        user.email = data["email"]
-        user.username = data["username"]
-        user.role = data["role"]
-        user.is_active = data["is_active"]
-        user.hashed_password = data["hashed_password"]
-        user.created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
-        return user
+        return User(**data)
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config.settings import settings
+from app.config.database import SessionLocal
+from app.config.logging_config import get_logger
+from app.dal.image_dal import ImageDAL
+from app.services.plan_service import PlanService
+from app.services.subscription_service import SubscriptionService
+
+logger = get_logger("warmup_service")
+
+
+class WarmupState:
+    def __init__(self):
+        self._done = threading.Event()
+        self.status = "pending"
+        self.started_at = None
+        self.finished_at = None
+        self.plans_warmed = 0
+        self.subscriptions_warmed = 0
+
+    @property
+    def is_ready(self) -> bool:
+        return self._done.is_set()
+
+    def start(self):
+        self.status = "running"
+        self.started_at = time.time()
+
+    def finish(self, status: str):
+        if self._done.is_set():
+            return
+        self.status = status
+        self.finished_at = time.time()
+        self._done.set()
+
+    def stats(self) -> dict:
+        duration = None
+        if self.started_at is not None:
+            duration = round((self.finished_at or time.time()) - self.started_at, 3)
+        return {
+            "status": self.status,
+            "duration_seconds": duration,
+            "plans_warmed": self.plans_warmed,
+            "subscriptions_warmed": self.subscriptions_warmed,
+        }
+
+
+warmup_state = WarmupState()
+
+
+class WarmupService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.image_dal = ImageDAL(db)
+        self.plan_service = PlanService(db)
+        self.subscription_service = SubscriptionService(db)
+
+    async def warm_plans(self) -> int:
+        plans = await self.plan_service.get_all_plans(include_deleted=False)
+        for plan in plans:
+            await self.plan_service.get_plan_by_id(plan.id)
+            await self.plan_service.get_plan_by_name(plan.name)
+        logger.info("Warm-up: cached %s plans", len(plans))
+        return len(plans)
+
+    async def warm_active_subscriptions(self, deadline: float) -> int:
+        since = datetime.now() - timedelta(hours=settings.CACHE_WARMUP_ACTIVE_WINDOW_HOURS)
+        user_ids = await self.image_dal.get_recent_user_ids(since, limit=settings.CACHE_WARMUP_MAX_USERS)
+        warmed = 0
+        batch_size = settings.CACHE_WARMUP_BATCH_SIZE
+        for start in range(0, len(user_ids), batch_size):
+            if time.time() >= deadline:
+                logger.warning("Warm-up: deadline reached after %s/%s subscriptions", warmed, len(user_ids))
+                break
+            warmed += await self.subscription_service.warm_active_subscriptions(user_ids[start:start + batch_size])
+            warmup_state.subscriptions_warmed = warmed
+        logger.info("Warm-up: cached active subscriptions for %s recently active users", warmed)
+        return warmed
+
+
+_warmup_task = None
+
+
+async def _run_warmup(deadline: float):
+    async with SessionLocal() as db:
+        warmup_service = WarmupService(db)
+        warmup_state.plans_warmed = await warmup_service.warm_plans()
+        await warmup_service.warm_active_subscriptions(deadline)
+
+
+async def _run_warmup_with_timeout(deadline: float):
+    try:
+        await asyncio.wait_for(_run_warmup(deadline), timeout=settings.CACHE_WARMUP_TIMEOUT)
+        warmup_state.finish("completed")
+        logger.info("Warm-up completed in %ss", warmup_state.stats()['duration_seconds'])
+    except asyncio.TimeoutError:
+        logger.warning("Warm-up timed out after %ss, marking instance ready", settings.CACHE_WARMUP_TIMEOUT)
+        warmup_state.finish("timed_out")
+    except Exception as e:
+        logger.error("Warm-up failed: %s", e)
+        warmup_state.finish("failed")
+
+
+def start_warmup():
+    global _warmup_task
+    if not settings.CACHE_WARMUP_ENABLED:
+        warmup_state.finish("disabled")
+        return
+    
+    logger.info("Starting cache warm-up")
+    warmup_state.start()
+    deadline = time.time() + settings.CACHE_WARMUP_TIMEOUT
+    _warmup_task = asyncio.create_task(_run_warmup_with_timeout(deadline), name="cache-warmup")
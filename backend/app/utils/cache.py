@@ -1,93 +1,714 @@
 import redis
+from redis import asyncio as aioredis
 from typing import Optional, Any
+import asyncio
 import json
+import math
+import os
+import random
+import threading
+import time
+import uuid
+import weakref
 from app.config.settings import settings
 from app.config.logging_config import get_logger
+from app.utils.local_cache import LocalCache, MISSING
+from app.utils.codecs import CacheSerializer
+from app.utils.circuit_breaker import CircuitBreaker
+from app.utils.metrics import record_cache_lookup
+from app.utils.tracing import trace_methods
 
 logger = get_logger("cache")
 
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+class PoolExhaustedError(redis.ConnectionError):
+    """No pooled connection came free within REDIS_POOL_TIMEOUT: this process is saturated, Redis itself may be healthy."""
+
+
+class _CountingConnectionPool(aioredis.BlockingConnectionPool):
+    """Waits for a free connection when the pool is full and counts checked-out connections through get_connection/release."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_use = 0
+        self.peak_in_use = 0
+    
+    async def get_connection(self, *args, **kwargs):
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except redis.ConnectionError as e:
+            if isinstance(e.__cause__, asyncio.TimeoutError):
+                raise PoolExhaustedError(str(e)) from e
+            raise
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        return connection
+    
+    async def release(self, connection):
+        self.in_use -= 1
+        await super().release(connection)
+
+
+@trace_methods
 class CacheService:
     def __init__(self):
+        self.instance_id = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.local_cache = None
+        self._invalidation_thread = None
+        self._flights = weakref.WeakKeyDictionary()
+        self._loop = None
+        self.serializer = CacheSerializer(
+            codec=settings.CACHE_CODEC,
+            compression_threshold=settings.CACHE_COMPRESSION_THRESHOLD,
+            compression_level=settings.CACHE_COMPRESSION_LEVEL
+        )
+        self._deferred_invalidations = []
+        self._deferred_dropped = 0
+        self._deferred_lock = threading.Lock()
+        self._retry_task = None
+        connection_options = {
+            "host": settings.REDIS_HOST,
+            "port": settings.REDIS_PORT,
+            "db": settings.REDIS_DB,
+            "socket_connect_timeout": settings.REDIS_CONNECT_TIMEOUT,
+            "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+            "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+        }
+        self.connection_pool = _CountingConnectionPool(
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            **connection_options
+        )
+        self.redis_client = aioredis.Redis(connection_pool=self.connection_pool, decode_responses=False)
+        self.control_client = redis.Redis(decode_responses=False, **connection_options)
+        self.breaker = CircuitBreaker(
+            "redis",
+            probe=self.control_client.ping,
+            failure_threshold=settings.CACHE_BREAKER_FAILURE_THRESHOLD,
+            failure_window=settings.CACHE_BREAKER_FAILURE_WINDOW,
+            probe_interval=settings.CACHE_BREAKER_PROBE_INTERVAL,
+            on_close=self._on_redis_recovered
+        )
+    
+    def connect(self):
+        """Checks Redis once at startup on a daemon thread, so a slow Redis delays neither boot nor shutdown."""
+        threading.Thread(target=self._connect, name="cache-connect", daemon=True).start()
+    
+    def _connect(self):
         try:
-            self.redis_client = redis.Redis(
-                host=getattr(settings, 'REDIS_HOST', 'localhost'),
-                port=getattr(settings, 'REDIS_PORT', 6379),
-                db=getattr(settings, 'REDIS_DB', 0),
-                decode_responses=True
-            )
-            self.redis_client.ping()
-            self.enabled = True
+            self.control_client.ping()
             logger.info("Cache service initialized successfully")
-        except (redis.ConnectionError, AttributeError) as e:
-            logger.warning(f"Redis not available, caching disabled: {str(e)}")
-            self.redis_client = None
-            self.enabled = False
+        except redis.RedisError as e:
+            logger.warning("Redis not available, caching disabled until it recovers: %s", e)
+            self.breaker.open()
+        
+        if self.enabled and settings.CACHE_LOCAL_ENABLED and self.local_cache is None:
+            self._enable_local_cache()
+    
+    async def ping(self, timeout: float) -> bool:
+        try:
+            return bool(await asyncio.wait_for(self.redis_client.ping(), timeout))
+        except Exception as e:
+            logger.debug("Redis ping failed: %s", e)
+            return False
+    
+    @property
+    def enabled(self) -> bool:
+        return self.breaker.is_closed
+    
+    def _record_error(self, error: Exception):
+        # A wait for a pooled connection measures our own load, not Redis, so it must not open the breaker.
+        if isinstance(error, (redis.ConnectionError, redis.TimeoutError)) and not isinstance(error, PoolExhaustedError):
+            self.breaker.record_failure()
+    
+    def _record_invalidation_error(self, error: Exception, operation: str, target):
+        """An invalidation that failed on the connection is retried later, even if the breaker has not opened yet."""
+        self._record_error(error)
+        if isinstance(error, (redis.ConnectionError, redis.TimeoutError)):
+            self._defer_invalidation(operation, target)
+    
+    def _on_redis_recovered(self):
+        if self.local_cache is not None:
+            self.local_cache.clear()
+        elif settings.CACHE_LOCAL_ENABLED:
+            self._enable_local_cache()
+        if self._loop is not None and not self._loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self._replay_deferred_invalidations(), self._loop)
+    
+    def _defer_invalidation(self, operation: str, target):
+        self._loop = asyncio.get_running_loop()
+        with self._deferred_lock:
+            if (operation, target) in self._deferred_invalidations[-16:]:
+                return
+            if len(self._deferred_invalidations) < settings.CACHE_MAX_DEFERRED_INVALIDATIONS:
+                self._deferred_invalidations.append((operation, target))
+            else:
+                self._deferred_dropped += 1
+                logger.warning(
+                    "Deferred invalidation queue full, dropping %s: %s (the cache is flushed on recovery)",
+                    operation, target
+                )
+        self._schedule_retry()
+    
+    def _schedule_retry(self):
+        # While the breaker is closed no recovery callback will come, so the queue is replayed after a pause.
+        if self.enabled and self._retry_task is None:
+            self._retry_task = self._loop.create_task(self._retry_deferred_invalidations())
+    
+    async def _retry_deferred_invalidations(self):
+        try:
+            await asyncio.sleep(settings.CACHE_BREAKER_PROBE_INTERVAL)
+        finally:
+            self._retry_task = None
+        if self.enabled:
+            await self._replay_deferred_invalidations()
+    
+    async def _replay_deferred_invalidations(self):
+        with self._deferred_lock:
+            pending = self._deferred_invalidations
+            dropped = self._deferred_dropped
+            self._deferred_invalidations = []
+            self._deferred_dropped = 0
+        
+        if dropped:
+            logger.warning("%s invalidations were dropped while Redis was unavailable, flushing the cache", dropped)
+            if not await self.clear_all():
+                with self._deferred_lock:
+                    self._deferred_invalidations[:0] = pending
+                    self._deferred_dropped += dropped
+                self._schedule_retry()
+            return
+        
+        if pending:
+            logger.info("Replaying %s invalidations deferred while Redis was unavailable", len(pending))
+        for operation, target in pending:
+            if operation == "keys":
+                await self.delete_many(target)
+            elif operation == "tag":
+                await self.invalidate_tag(*target)
+            elif operation == "pattern":
+                await self.delete_pattern(target)
+            elif operation == "version":
+                await self.bump_version(target)
+    
+    def _enable_local_cache(self):
+        try:
+            pubsub = self.control_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{settings.CACHE_INVALIDATION_CHANNEL: self._handle_invalidation})
+            self._invalidation_thread = pubsub.run_in_thread(
+                sleep_time=1.0,
+                daemon=True,
+                exception_handler=self._handle_invalidation_error
+            )
+            self.local_cache = LocalCache(
+                max_size=settings.CACHE_LOCAL_MAX_SIZE,
+                namespace_ttls=settings.CACHE_LOCAL_TTLS
+            )
+            logger.info("Local cache tier enabled (max size: %s)", settings.CACHE_LOCAL_MAX_SIZE)
+        except Exception as e:
+            logger.warning("Local cache tier disabled, invalidation channel unavailable: %s", e)
+            self.local_cache = None
     
-    def get(self, key: str) -> Optional[Any]:
+    def _handle_invalidation(self, message):
+        if self.local_cache is None:
+            return
+        try:
+            event = json.loads(message["data"])
+        except (TypeError, ValueError):
+            logger.warning("Ignoring malformed cache invalidation message: %s", message.get('data'))
+            return
+        
+        if event.get("origin") == self.instance_id:
+            return
+        
+        operation = event.get("op")
+        if operation == "delete":
+            self.local_cache.delete(*event.get("keys", []))
+        elif operation == "pattern":
+            self.local_cache.delete_pattern(event["pattern"])
+        elif operation == "clear":
+            self.local_cache.clear()
+    
+    def _handle_invalidation_error(self, error, pubsub, thread):
+        logger.error("Cache invalidation listener error, flushing local cache: %s", error)
+        if self.local_cache is not None:
+            self.local_cache.clear()
+        time.sleep(1.0)
+    
+    async def _publish_invalidation(self, event: dict):
+        if self.local_cache is None:
+            return
+        try:
+            event["origin"] = self.instance_id
+            await self.redis_client.publish(settings.CACHE_INVALIDATION_CHANNEL, json.dumps(event))
+        except Exception as e:
+            self._record_error(e)
+            logger.error("Cache invalidation publish error: %s", e)
+    
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self._read(key)
+        record_cache_lookup(key, hit=value is not None)
+        return value
+    
+    async def _read(self, key: str) -> Optional[Any]:
+        """get() without the lookup metric, for callers that count the lookup themselves."""
         if not self.enabled:
             return None
         
+        if self.local_cache is not None:
+            value = self.local_cache.get(key)
+            if value is not MISSING:
+                logger.debug("Local cache hit: %s", key)
+                return value
+        
         try:
-            value = self.redis_client.get(key)
+            value = await self.redis_client.get(key)
             if value:
-                logger.debug(f"Cache hit: {key}")
-                return json.loads(value)
-            logger.debug(f"Cache miss: {key}")
+                logger.debug("Cache hit: %s", key)
+                result = self.serializer.loads(value)
+                if self.local_cache is not None:
+                    self.local_cache.set(key, result)
+                return result
+            logger.debug("Cache miss: %s", key)
             return None
         except Exception as e:
-            logger.error(f"Cache get error for key {key}: {str(e)}")
+            self._record_error(e)
+            logger.error("Cache get error for key %s: %s", key, e)
             return None
     
-    def set(self, key: str, value: Any, ttl: int = 300):
+    async def set(self, key: str, value: Any, ttl: int = 300, tags: Optional[list[str]] = None):
         if not self.enabled:
             return False
         
         try:
-            serialized = json.dumps(value, default=str)
-            self.redis_client.setex(key, ttl, serialized)
-            logger.debug(f"Cache set: {key} (TTL: {ttl}s)")
+            serialized = self.serializer.dumps(value)
+            if tags:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.setex(key, ttl, serialized)
+                for tag in tags:
+                    pipe.sadd(self._tag_key(tag), key)
+                    pipe.expire(self._tag_key(tag), ttl)
+                await pipe.execute()
+            else:
+                await self.redis_client.setex(key, ttl, serialized)
+            if self.local_cache is not None:
+                self.local_cache.set(key, self.serializer.loads(serialized), ttl=ttl)
+            logger.debug("Cache set: %s (TTL: %ss)", key, ttl)
             return True
         except Exception as e:
-            logger.error(f"Cache set error for key {key}: {str(e)}")
+            self._record_error(e)
+            logger.error("Cache set error for key %s: %s", key, e)
             return False
     
-    def delete(self, key: str):
+    async def get_many(self, keys: list[str]) -> dict:
+        result = await self._read_many(keys)
+        for key in keys:
+            record_cache_lookup(key, hit=key in result)
+        return result
+    
+    async def _read_many(self, keys: list[str]) -> dict:
+        if not self.enabled or not keys:
+            return {}
+        
+        result = {}
+        remote_keys = []
+        for key in keys:
+            value = self.local_cache.get(key) if self.local_cache is not None else MISSING
+            if value is MISSING:
+                remote_keys.append(key)
+            else:
+                result[key] = value
+        
+        if not remote_keys:
+            return result
+        
+        try:
+            values = await self.redis_client.mget(remote_keys)
+            for key, value in zip(remote_keys, values):
+                if value:
+                    decoded = self.serializer.loads(value)
+                    result[key] = decoded
+                    if self.local_cache is not None:
+                        self.local_cache.set(key, decoded)
+            logger.debug("Cache get_many: %s/%s hits", len(result), len(keys))
+            return result
+        except Exception as e:
+            self._record_error(e)
+            logger.error("Cache get_many error for %s keys: %s", len(remote_keys), e)
+            return result
+    
+    async def set_many(self, mapping: dict, ttl: int = 300, tags: Optional[list[str]] = None):
+        if not self.enabled or not mapping:
+            return False
+        
+        try:
+            serialized = {key: self.serializer.dumps(value) for key, value in mapping.items()}
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, value in serialized.items():
+                pipe.setex(key, ttl, value)
+            for tag in tags or []:
+                pipe.sadd(self._tag_key(tag), *serialized)
+                pipe.expire(self._tag_key(tag), ttl)
+            await pipe.execute()
+            if self.local_cache is not None:
+                for key, value in serialized.items():
+                    self.local_cache.set(key, self.serializer.loads(value), ttl=ttl)
+            logger.debug("Cache set_many: %s keys (TTL: %ss)", len(serialized), ttl)
+            return True
+        except Exception as e:
+            self._record_error(e)
+            logger.error("Cache set_many error for %s keys: %s", len(mapping), e)
+            return False
+    
+    async def delete_many(self, keys: list[str]):
+        if not keys:
+            return 0
+        if not self.enabled:
+            self._defer_invalidation("keys", list(keys))
+            return 0
+        
+        if self.local_cache is not None:
+            self.local_cache.delete(*keys)
+        
+        try:
+            result = await self.redis_client.unlink(*keys)
+            await self._publish_invalidation({"op": "delete", "keys": list(keys)})
+            logger.debug("Cache delete_many: %s", ', '.join(keys))
+            return result
+        except Exception as e:
+            self._record_invalidation_error(e, "keys", list(keys))
+            logger.error("Cache delete_many error for %s keys: %s", len(keys), e)
+            return 0
+    
+    async def get_version(self, namespace: str) -> Optional[int]:
+        """Returns None when Redis cannot answer, so callers skip version-keyed caching instead of trusting a default."""
+        if not self.enabled:
+            return None
+        key = f"version:{namespace}"
+        if self.local_cache is not None:
+            value = self.local_cache.get(key)
+            if value is not MISSING:
+                record_cache_lookup(key, hit=True)
+                return value
+        
+        try:
+            value = await self.redis_client.get(key)
+            record_cache_lookup(key, hit=value is not None)
+            if value is None:
+                await self.redis_client.set(key, self._version_seed(), nx=True)
+                value = await self.redis_client.get(key)
+            version = int(value)
+        except Exception as e:
+            self._record_error(e)
+            logger.error("Cache version read error for %s: %s", namespace, e)
+            return None
+        if self.local_cache is not None:
+            self.local_cache.set(key, version)
+        return version
+    
+    @staticmethod
+    def _version_seed() -> int:
+        # A missing counter (first use, Redis flush or restart) starts from the clock rather than 0, so it never
+        # counts up through numbers an earlier counter already handed out and a worker may still cache bodies under.
+        return time.time_ns() // 1000
+    
+    async def bump_version(self, namespace: str) -> Optional[int]:
+        key = f"version:{namespace}"
         if not self.enabled:
+            self._defer_invalidation("version", namespace)
+            return None
+        
+        if self.local_cache is not None:
+            self.local_cache.delete(key)
+        
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.set(key, self._version_seed(), nx=True)
+            pipe.incr(key)
+            version = (await pipe.execute())[-1]
+            await self._publish_invalidation({"op": "delete", "keys": [key]})
+            logger.debug("Cache version bumped: %s -> %s", namespace, version)
+            return version
+        except Exception as e:
+            self._record_invalidation_error(e, "version", namespace)
+            logger.error("Cache version bump error for %s: %s", namespace, e)
+            return None
+    
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"cache:tag:{tag}"
+    
+    async def delete(self, key: str):
+        if not self.enabled:
+            self._defer_invalidation("keys", [key])
             return False
         
+        if self.local_cache is not None:
+            self.local_cache.delete(key)
+        
         try:
-            result = self.redis_client.delete(key)
-            logger.debug(f"Cache delete: {key}")
+            result = await self.redis_client.delete(key)
+            await self._publish_invalidation({"op": "delete", "keys": [key]})
+            logger.debug("Cache delete: %s", key)
             return result > 0
         except Exception as e:
-            logger.error(f"Cache delete error for key {key}: {str(e)}")
+            self._record_invalidation_error(e, "keys", [key])
+            logger.error("Cache delete error for key %s: %s", key, e)
             return False
     
-    def delete_pattern(self, pattern: str):
+    async def delete_pattern(self, pattern: str):
         if not self.enabled:
+            self._defer_invalidation("pattern", pattern)
             return 0
         
         try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                result = self.redis_client.delete(*keys)
-                logger.info(f"Cache pattern delete: {pattern} ({result} keys)")
-                return result
+            return await self._scan_delete(pattern)
+        except Exception as e:
+            self._record_invalidation_error(e, "pattern", pattern)
+            logger.error("Cache pattern delete error for %s: %s", pattern, e)
+            return 0
+    
+    async def _scan_delete(self, pattern: str) -> int:
+        if self.local_cache is not None:
+            self.local_cache.delete_pattern(pattern)
+        
+        deleted = 0
+        batch = []
+        async for key in self.redis_client.scan_iter(match=pattern, count=settings.CACHE_SCAN_BATCH_SIZE):
+            batch.append(key)
+            if len(batch) >= settings.CACHE_SCAN_BATCH_SIZE:
+                deleted += await self.redis_client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += await self.redis_client.unlink(*batch)
+        await self._publish_invalidation({"op": "pattern", "pattern": pattern})
+        if deleted:
+            logger.info("Cache pattern delete: %s (%s keys)", pattern, deleted)
+        return deleted
+    
+    async def invalidate_tag(self, tag: str, fallback_pattern: Optional[str] = None):
+        if not self.enabled:
+            self._defer_invalidation("tag", (tag, fallback_pattern))
             return 0
+        
+        tag_key = self._tag_key(tag)
+        try:
+            members = [member.decode("utf-8") for member in await self.redis_client.smembers(tag_key)]
+            if not members:
+                return await self._migrate_untagged(tag, fallback_pattern)
+            
+            if self.local_cache is not None:
+                self.local_cache.delete(*members)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.unlink(*members)
+            pipe.srem(tag_key, *members)
+            deleted = (await pipe.execute())[0]
+            await self._publish_invalidation({"op": "delete", "keys": members})
+            logger.info("Cache tag invalidated: %s (%s keys)", tag, deleted)
+            return deleted
         except Exception as e:
-            logger.error(f"Cache pattern delete error for {pattern}: {str(e)}")
+            self._record_invalidation_error(e, "tag", (tag, fallback_pattern))
+            logger.error("Cache tag invalidation error for %s: %s", tag, e)
             return 0
     
-    def clear_all(self):
+    async def _migrate_untagged(self, tag: str, fallback_pattern: Optional[str]) -> int:
+        """Scans for keys written before the tag existed, once per tag; an empty tag set is normal afterwards."""
+        if not fallback_pattern or not settings.CACHE_LEGACY_SCAN_FALLBACK:
+            return 0
+        marker = f"{self._tag_key(tag)}:migrated"
+        if await self.redis_client.exists(marker):
+            return 0
+        deleted = await self._scan_delete(fallback_pattern)
+        await self.redis_client.set(marker, 1)
+        logger.info("Legacy keys for tag %s removed by SCAN (%s keys); later invalidations use the tag set only", tag, deleted)
+        return deleted
+    
+    async def get_or_compute(self, key: str, compute, ttl: int = 300, tags: Optional[list[str]] = None):
+        if not self.enabled:
+            record_cache_lookup(key, hit=False)
+            return await compute()
+        
+        entry = await self._get_entry(key)
+        if entry is not None:
+            remaining = entry["exp"] - time.time()
+            if remaining > 0 and not self._should_refresh_early(entry["delta"], remaining):
+                record_cache_lookup(key, hit=True)
+                return entry["v"]
+            token = await self._acquire_lock(key)
+            if token is None:
+                logger.debug("Serving stale value while another worker refreshes: %s", key)
+                record_cache_lookup(key, hit=True)
+                return entry["v"]
+            record_cache_lookup(key, hit=False)
+            try:
+                logger.debug("Refreshing cache entry (%s): %s", 'expired' if remaining <= 0 else 'early', key)
+                return await self._compute_and_store(key, compute, ttl, tags)
+            finally:
+                await self._release_lock(key, token)
+        
+        # Concurrent misses for a key wait on the first caller's fill. Nothing is held while compute() runs,
+        # so a compute that fills other keys (user:with_subscription -> user:id) cannot wait on itself.
+        flights = self._flights.setdefault(asyncio.get_running_loop(), {})
+        while (flight := flights.get(key)) is not None:
+            await flight.wait()
+            entry = await self._get_entry(key)
+            if entry is not None:
+                record_cache_lookup(key, hit=True)
+                return entry["v"]
+        
+        flight = flights[key] = asyncio.Event()
+        try:
+            token = await self._acquire_lock(key)
+            if token is None:
+                entry = await self._wait_for_entry(key)
+                if entry is not None:
+                    record_cache_lookup(key, hit=True)
+                    return entry["v"]
+                logger.warning("Timed out waiting for cache fill, computing locally: %s", key)
+                record_cache_lookup(key, hit=False)
+                return await self._compute_and_store(key, compute, ttl, tags)
+            record_cache_lookup(key, hit=False)
+            try:
+                return await self._compute_and_store(key, compute, ttl, tags)
+            finally:
+                await self._release_lock(key, token)
+        finally:
+            del flights[key]
+            flight.set()
+    
+    async def get_or_compute_many(self, keys: list[str], compute_missing, ttl: int = 300, tags: Optional[list[str]] = None) -> dict:
+        if not self.enabled:
+            if keys:
+                record_cache_lookup(keys[0], hit=False, count=len(keys))
+            return await compute_missing(list(keys))
+        
+        entries = await self._read_many(keys)
+        now = time.time()
+        result = {}
+        missing = []
+        for key in keys:
+            entry = entries.get(key)
+            if self._is_entry(entry) and entry["exp"] > now:
+                result[key] = entry["v"]
+            else:
+                missing.append(key)
+        if keys:
+            record_cache_lookup(keys[0], hit=True, count=len(result))
+            record_cache_lookup(keys[0], hit=False, count=len(missing))
+        
+        if missing:
+            start = time.time()
+            computed = await compute_missing(missing)
+            delta = (time.time() - start) / len(missing)
+            await self.set_many(
+                {key: self._make_entry(value, ttl, delta) for key, value in computed.items() if value is not None},
+                ttl=ttl + settings.CACHE_STALE_TTL,
+                tags=tags
+            )
+            result.update(computed)
+        
+        return result
+    
+    @staticmethod
+    def _is_entry(entry) -> bool:
+        return isinstance(entry, dict) and "v" in entry and "exp" in entry
+    
+    @staticmethod
+    def _make_entry(value: Any, ttl: int, delta: float) -> dict:
+        return {"v": value, "exp": time.time() + ttl, "delta": delta}
+    
+    async def _get_entry(self, key: str) -> Optional[dict]:
+        entry = await self._read(key)
+        return entry if self._is_entry(entry) else None
+    
+    async def _compute_and_store(self, key: str, compute, ttl: int, tags: Optional[list[str]]):
+        start = time.time()
+        value = await compute()
+        delta = time.time() - start
+        if value is not None:
+            await self.set(key, self._make_entry(value, ttl, delta), ttl=ttl + settings.CACHE_STALE_TTL, tags=tags)
+        return value
+    
+    @staticmethod
+    def _should_refresh_early(delta: float, remaining: float) -> bool:
+        return -delta * settings.CACHE_EARLY_REFRESH_BETA * math.log(1.0 - random.random()) >= remaining
+    
+    async def _acquire_lock(self, key: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.redis_client.set(
+                f"cache:lock:{key}",
+                token,
+                nx=True,
+                px=int(settings.CACHE_LOCK_TIMEOUT * 1000)
+            )
+            return token if acquired else None
+        except Exception as e:
+            self._record_error(e)
+            logger.error("Cache lock error for key %s: %s", key, e)
+            return token
+    
+    async def reserve(self, key: str, seconds: float) -> bool:
+        if not self.enabled:
+            return True
+        try:
+            return bool(await self.redis_client.set(key, self.instance_id, nx=True, px=max(1, int(seconds * 1000))))
+        except Exception as e:
+            self._record_error(e)
+            logger.error("Cache reserve error for key %s: %s", key, e)
+            return True
+    
+    async def _release_lock(self, key: str, token: str):
+        try:
+            await self.redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, f"cache:lock:{key}", token)
+        except Exception as e:
+            self._record_error(e)
+            logger.error("Cache lock release error for key %s: %s", key, e)
+    
+    async def _wait_for_entry(self, key: str) -> Optional[dict]:
+        deadline = time.time() + settings.CACHE_LOCK_WAIT
+        while time.time() < deadline:
+            await asyncio.sleep(0.05)
+            entry = await self._get_entry(key)
+            if entry is not None:
+                return entry
+        return None
+    
+    async def clear_all(self):
         if not self.enabled:
             return False
         
+        if self.local_cache is not None:
+            self.local_cache.clear()
+        
         try:
-            self.redis_client.flushdb()
+            await self.redis_client.flushdb()
+            await self._publish_invalidation({"op": "clear"})
             logger.info("Cache cleared completely")
             return True
         except Exception as e:
-            logger.error(f"Cache clear error: {str(e)}")
+            self._record_error(e)
+            logger.error("Cache clear error: %s", e)
             return False
+    
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "breaker": self.breaker.stats(),
+            "pool": {
+                "max_connections": self.connection_pool.max_connections,
+                "in_use": self.connection_pool.in_use,
+                "peak_in_use": self.connection_pool.peak_in_use,
+            },
+            "deferred_invalidations": len(self._deferred_invalidations),
+            "dropped_invalidations": self._deferred_dropped,
+            "local": self.local_cache.stats() if self.local_cache is not None else None,
+        }
 
 cache_service = CacheService()
@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+from app.config.logging_config import get_logger
+from app.utils.metrics import record_breaker_state
+
+logger = get_logger("circuit_breaker")
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+
+    def __init__(
+        self,
+        name: str,
+        probe: Callable[[], bool],
+        failure_threshold: int = 5,
+        failure_window: float = 10.0,
+        probe_interval: float = 5.0,
+        on_close: Optional[Callable[[], None]] = None
+    ):
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.probe_interval = probe_interval
+        self.on_close = on_close
+        self.state = self.CLOSED
+        self._failures = deque()
+        self._lock = threading.Lock()
+        self._probe_thread = None
+        self._opened_at = None
+        self.open_count = 0
+        self.degraded_seconds = 0.0
+        record_breaker_state(name, is_open=False)
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state == self.CLOSED
+
+    def record_failure(self):
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.OPEN:
+                return
+            self._failures.append(now)
+            while self._failures and self._failures[0] < now - self.failure_window:
+                self._failures.popleft()
+            if len(self._failures) < self.failure_threshold:
+                return
+        self.open()
+
+    def open(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                return
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._failures.clear()
+            self.open_count += 1
+            self._probe_thread = threading.Thread(
+                target=self._probe_loop,
+                name=f"{self.name}-probe",
+                daemon=True
+            )
+            self._probe_thread.start()
+        record_breaker_state(self.name, is_open=True)
+        logger.warning("Circuit breaker '%s' opened, failing fast until the dependency recovers", self.name)
+
+    def close(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            degraded = time.monotonic() - self._opened_at
+            self.degraded_seconds += degraded
+            self.state = self.CLOSED
+            self._opened_at = None
+        record_breaker_state(self.name, is_open=False, degraded_seconds=degraded)
+        logger.info("Circuit breaker '%s' closed after %.1fs degraded", self.name, degraded)
+        if self.on_close is not None:
+            self.on_close()
+
+    def _probe_loop(self):
+        while self.state == self.OPEN:
+            time.sleep(self.probe_interval)
+            try:
+                healthy = self.probe()
+            except Exception as e:
+                logger.debug("Circuit breaker '%s' probe failed: %s", self.name, e)
+                healthy = False
+            if healthy:
+                self.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            current = time.monotonic() - self._opened_at if self._opened_at is not None else 0.0
+            return {
+                "state": self.state,
+                "open_count": self.open_count,
+                "degraded_seconds_total": round(self.degraded_seconds + current, 3),
+                "degraded_seconds_current": round(current, 3),
+            }
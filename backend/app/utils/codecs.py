@@ -0,0 +1,157 @@
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+from app.config.logging_config import get_logger
+
+logger = get_logger("codecs")
+
+COMPRESSION_NONE = b"\x00"
+COMPRESSION_ZLIB = b"\x01"
+
+MSGPACK_EXT_DATETIME = 1
+MSGPACK_EXT_DATE = 2
+MSGPACK_EXT_DECIMAL = 3
+
+
+def _tag_value(value: Any):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"$dec": str(value)}
+    raise TypeError(f"Object of type {type(value).__name__} is not cache serializable")
+
+
+def _untag_object(obj: dict):
+    if len(obj) == 1:
+        if "$dt" in obj:
+            return datetime.fromisoformat(obj["$dt"])
+        if "$d" in obj:
+            return date.fromisoformat(obj["$d"])
+        if "$dec" in obj:
+            return Decimal(obj["$dec"])
+    return obj
+
+
+def _untag_tree(value: Any):
+    if isinstance(value, dict):
+        return _untag_object({key: _untag_tree(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_untag_tree(item) for item in value]
+    return value
+
+
+class JsonCodec:
+    name = "json"
+    codec_id = b"\x01"
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, default=_tag_value, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data, object_hook=_untag_object)
+
+
+class OrjsonCodec:
+    name = "orjson"
+    codec_id = b"\x02"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def encode(self, value: Any) -> bytes:
+        return self._orjson.dumps(value, default=_tag_value, option=self._orjson.OPT_PASSTHROUGH_DATETIME)
+
+    def decode(self, data: bytes) -> Any:
+        return _untag_tree(self._orjson.loads(data))
+
+
+class MsgpackCodec:
+    name = "msgpack"
+    codec_id = b"\x03"
+
+    def __init__(self):
+        import msgpack
+        self._msgpack = msgpack
+
+    def _default(self, value: Any):
+        if isinstance(value, datetime):
+            return self._msgpack.ExtType(MSGPACK_EXT_DATETIME, value.isoformat().encode("utf-8"))
+        if isinstance(value, date):
+            return self._msgpack.ExtType(MSGPACK_EXT_DATE, value.isoformat().encode("utf-8"))
+        if isinstance(value, Decimal):
+            return self._msgpack.ExtType(MSGPACK_EXT_DECIMAL, str(value).encode("utf-8"))
+        raise TypeError(f"Object of type {type(value).__name__} is not cache serializable")
+
+    def _ext_hook(self, code: int, data: bytes):
+        if code == MSGPACK_EXT_DATETIME:
+            return datetime.fromisoformat(data.decode("utf-8"))
+        if code == MSGPACK_EXT_DATE:
+            return date.fromisoformat(data.decode("utf-8"))
+        if code == MSGPACK_EXT_DECIMAL:
+            return Decimal(data.decode("utf-8"))
+        return self._msgpack.ExtType(code, data)
+
+    def encode(self, value: Any) -> bytes:
+        return self._msgpack.packb(value, default=self._default, use_bin_type=True)
+
+    def decode(self, data: bytes) -> Any:
+        return self._msgpack.unpackb(data, ext_hook=self._ext_hook, raw=False, strict_map_key=False)
+
+
+CODECS = {
+    JsonCodec.name: JsonCodec,
+    OrjsonCodec.name: OrjsonCodec,
+    MsgpackCodec.name: MsgpackCodec,
+}
+
+
+class CacheSerializer:
+    def __init__(self, codec: str = "json", compression_threshold: int = 1024, compression_level: int = 6):
+        self.codec = self._load_codec(codec)
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self._decoders = {self.codec.codec_id: self.codec}
+
+    @staticmethod
+    def _load_codec(name: str):
+        codec_class = CODECS.get(name)
+        if codec_class is None:
+            logger.warning("Unknown cache codec '%s', falling back to json", name)
+            return JsonCodec()
+        try:
+            return codec_class()
+        except ImportError:
+            logger.warning("Cache codec '%s' is not installed, falling back to json", name)
+            return JsonCodec()
+
+    def _decoder_for(self, codec_id: bytes):
+        decoder = self._decoders.get(codec_id)
+        if decoder is None:
+            codec_class = next((c for c in CODECS.values() if c.codec_id == codec_id), None)
+            if codec_class is None:
+                raise ValueError(f"Unknown cache codec id {codec_id!r}")
+            decoder = codec_class()
+            self._decoders[codec_id] = decoder
+        return decoder
+
+    def dumps(self, value: Any) -> bytes:
+        payload = self.codec.encode(value)
+        if self.compression_threshold and len(payload) > self.compression_threshold:
+            return self.codec.codec_id + COMPRESSION_ZLIB + zlib.compress(payload, self.compression_level)
+        return self.codec.codec_id + COMPRESSION_NONE + payload
+
+    def loads(self, data: bytes) -> Any:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        header = data[:1]
+        if header not in (JsonCodec.codec_id, OrjsonCodec.codec_id, MsgpackCodec.codec_id):
+            return json.loads(data)
+        payload = data[2:]
+        if data[1:2] == COMPRESSION_ZLIB:
+            payload = zlib.decompress(payload)
+        return self._decoder_for(header).decode(payload)
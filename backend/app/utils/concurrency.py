@@ -0,0 +1,29 @@
+import asyncio
+import weakref
+from app.config.settings import settings
+
+# Probes and scrapes must answer while the application is saturated.
+_UNLIMITED_PATHS = frozenset({"/health", "/ready", "/metrics"})
+
+
+class ConcurrencyLimitMiddleware:
+    """Runs at most MAX_CONCURRENT_REQUESTS requests at once, so a burst queues here instead of timing out on Redis and the database."""
+
+    def __init__(self, app):
+        self.app = app
+        self._slots = weakref.WeakKeyDictionary()
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(settings.MAX_CONCURRENT_REQUESTS)
+        return slots
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or settings.MAX_CONCURRENT_REQUESTS <= 0 or scope["path"] in _UNLIMITED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        async with self._get_slots():
+            await self.app(scope, receive, send)
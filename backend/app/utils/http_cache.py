@@ -0,0 +1,84 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+from fastapi import Request, Response, status
+from app.config.settings import settings
+from app.config.logging_config import get_logger
+
+logger = get_logger("http_cache")
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, version: int) -> Optional[tuple[str, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def set(self, key: str, version: int, etag: str, body: bytes):
+        with self._lock:
+            self._entries[key] = (version, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+response_cache = ResponseCache(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+def make_etag(namespace: str, version: Optional[int], body: bytes) -> str:
+    digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+    return f'"{namespace}-{version if version is not None else "x"}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+async def cached_json_response(
+    request: Request,
+    namespace: str,
+    variant: str,
+    version: Optional[int],
+    render: Callable[[], Awaitable[bytes]],
+    max_age: int,
+    stale_while_revalidate: int
+) -> Response:
+    key = f"{namespace}:{variant}"
+    cached = response_cache.get(key, version) if version is not None else None
+    if cached is None:
+        body = await render()
+        etag = make_etag(namespace, version, body)
+        if version is not None:
+            response_cache.set(key, version, etag, body)
+            logger.debug("Response cached: %s (version %s)", key, version)
+    else:
+        etag, body = cached
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}",
+    }
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
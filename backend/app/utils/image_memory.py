@@ -0,0 +1,109 @@
+import math
+import os
+from typing import Optional
+from app.schemas.image import ImageOperation
+
+# Bytes Pillow allocates per pixel for a decoded image; multi-band 8-bit modes are stored padded to 32 bits.
+_PIXEL_BYTES = {"1": 1, "L": 1, "P": 1, "I;16": 2, "I;16L": 2, "I;16B": 2, "I;16N": 2}
+_PREMULTIPLIED_MODES = {"LA", "RGBA"}
+# BytesIO over-allocates while the encoder writes into it.
+_BUFFER_SLACK = 1.25
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def pixel_bytes(mode: str) -> int:
+    return _PIXEL_BYTES.get(mode, 4)
+
+
+def _rotated_size(width: int, height: int, angle: int) -> tuple[int, int]:
+    if angle % 90 == 0:
+        return (height, width) if angle % 180 else (width, height)
+    radians = math.radians(angle)
+    cos, sin = abs(math.cos(radians)), abs(math.sin(radians))
+    return math.ceil(width * cos + height * sin), math.ceil(width * sin + height * cos)
+
+
+def estimate_peak_bytes(
+    operation: ImageOperation,
+    width: int,
+    height: int,
+    mode: str,
+    input_bytes: int,
+    kwargs: dict
+) -> int:
+    """Predicts the peak bytes one request holds from the image header, mirroring ImageService._apply_operation.
+
+    The upload is counted throughout. The decoded image is released before encoding, so the peak is the larger
+    of the transform working set (decoded image, scratch copies and the output image) and the encode working set
+    (the output image and its encoded bytes, estimated with the input's compression ratio).
+    """
+    bpp = pixel_bytes(mode)
+    decoded = width * height * bpp
+    out_mode, scratch = mode, 0
+
+    if operation == ImageOperation.CROP:
+        out_width = min(kwargs.get("width", width // 2), width)
+        out_height = min(kwargs.get("height", height // 2), height)
+    elif operation == ImageOperation.GRAYSCALE:
+        out_width, out_height, out_mode = width, height, "L"
+    elif operation == ImageOperation.SEPIA:
+        out_width, out_height, out_mode = width, height, "RGB"
+        scratch = width * height
+    elif operation == ImageOperation.RESIZE:
+        out_width = kwargs.get("width", width // 2)
+        out_height = kwargs.get("height", height // 2)
+        # Two-pass resampling keeps a horizontally resized copy; alpha modes are premultiplied first.
+        scratch = out_width * height * bpp
+        if mode in _PREMULTIPLIED_MODES:
+            scratch += decoded
+    elif operation == ImageOperation.ROTATE:
+        out_width, out_height = _rotated_size(width, height, kwargs.get("angle", 90))
+    else:
+        # Gaussian blur runs its box passes through a full-size temporary image.
+        out_width, out_height = width, height
+        scratch = decoded
+
+    output = max(out_width, 0) * max(out_height, 0) * pixel_bytes(out_mode)
+    compression = min(max(input_bytes / decoded, 0.05), 1.1) if decoded else 1.0
+    encoded = int(output * compression * _BUFFER_SLACK)
+    return input_bytes + max(decoded + scratch + output, output + encoded)
+
+
+def current_rss() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class MemoryAccount:
+    """Tracks resident memory growth across one image request, sampled at stage boundaries.
+
+    RSS is process-wide, so concurrent requests inflate each other's numbers; Pillow allocates outside the
+    Python allocator, so tracemalloc would not see the decoded buffers at all.
+    """
+
+    def __init__(self):
+        self.baseline = current_rss()
+        self.peak = self.baseline
+        self.predicted = None
+
+    def sample(self):
+        rss = current_rss()
+        if rss is not None and self.peak is not None:
+            self.peak = max(self.peak, rss)
+
+    @property
+    def peak_bytes(self) -> Optional[int]:
+        if self.baseline is None:
+            return None
+        return self.peak - self.baseline
+
+    def log_fields(self) -> str:
+        fields = []
+        if self.predicted is not None:
+            fields.append(f"predicted_peak_mb={self.predicted / 1048576:.1f}")
+        if self.peak_bytes is not None:
+            fields.append(f"peak_rss_growth_mb={self.peak_bytes / 1048576:.1f}")
+        return " ".join(fields)
@@ -0,0 +1,83 @@
+import fnmatch
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+MISSING = object()
+
+
+class LocalCache:
+    def __init__(self, max_size: int = 1000, namespace_ttls: Optional[dict] = None):
+        self.max_size = max_size
+        self.namespace_ttls = namespace_ttls or {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def namespace(key: str) -> str:
+        return key.split(":", 1)[0]
+
+    def ttl_for(self, key: str) -> Optional[int]:
+        return self.namespace_ttls.get(self.namespace(key))
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        local_ttl = self.ttl_for(key)
+        if not local_ttl:
+            return False
+        if ttl is not None:
+            local_ttl = min(local_ttl, ttl)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + local_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def delete(self, *keys: str) -> int:
+        removed = 0
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    removed += 1
+        return removed
+
+    def delete_pattern(self, pattern: str) -> int:
+        with self._lock:
+            matched = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+            for key in matched:
+                del self._entries[key]
+        return len(matched)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,191 @@
+import os
+import time
+from typing import Optional
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from app.config.settings import settings
+
+MEGAPIXEL_BUCKETS = ((0.25, "<0.25"), (1, "0.25-1"), (4, "1-4"), (12, "4-12"), (24, "12-24"))
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status code",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+IMAGE_PROCESSING_DURATION = Histogram(
+    "image_processing_duration_seconds",
+    "Image decode, transform and encode time by operation and input size",
+    ["operation", "megapixels"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+IMAGE_STAGE_DURATION = Histogram(
+    "image_processing_stage_seconds",
+    "Time spent in each stage of an image processing request",
+    ["operation", "stage"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+IMAGE_PEAK_MEMORY = Histogram(
+    "image_processing_peak_memory_bytes",
+    "Predicted and measured (resident memory growth) peak memory of one image request",
+    ["operation", "kind"],
+    buckets=(1 << 20, 4 << 20, 16 << 20, 32 << 20, 64 << 20, 128 << 20, 256 << 20, 512 << 20, 1 << 30, 2 << 30)
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups by key namespace and result",
+    ["namespace", "result"]
+)
+TOKEN_CACHE_LOOKUPS = Counter(
+    "token_cache_lookups_total",
+    "Verified JWT payload cache lookups by result",
+    ["result"]
+)
+TOKEN_CACHE_REMOVALS = Counter(
+    "token_cache_removals_total",
+    "Entries removed from the JWT payload cache by reason",
+    ["reason"]
+)
+TOKEN_CACHE_SIZE = Gauge(
+    "token_cache_size",
+    "Entries in the JWT payload cache",
+    multiprocess_mode="livesum"
+)
+CIRCUIT_BREAKER_OPEN = Gauge(
+    "circuit_breaker_open",
+    "1 while the circuit breaker is open and the dependency is bypassed",
+    ["breaker"],
+    multiprocess_mode="livemax"
+)
+CIRCUIT_BREAKER_OPENS = Counter(
+    "circuit_breaker_opens_total",
+    "Times the circuit breaker opened",
+    ["breaker"]
+)
+CIRCUIT_BREAKER_DEGRADED = Counter(
+    "circuit_breaker_degraded_seconds_total",
+    "Seconds spent with the circuit breaker open, added when it closes",
+    ["breaker"]
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured connection pool size",
+    ["pool"],
+    multiprocess_mode="livesum"
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ["pool"],
+    multiprocess_mode="livesum"
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Connection checkouts that timed out",
+    ["pool"]
+)
+
+
+def megapixel_bucket(width: int, height: int) -> str:
+    megapixels = width * height / 1_000_000
+    for limit, label in MEGAPIXEL_BUCKETS:
+        if megapixels < limit:
+            return label
+    return f">{MEGAPIXEL_BUCKETS[-1][0]}"
+
+
+def route_template(scope) -> Optional[str]:
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return None
+    rendered = getattr(route, "path_format", template)
+    for name, value in scope.get("path_params", {}).items():
+        rendered = rendered.replace(f"{{{name}}}", str(value))
+    path = scope.get("path", "")
+    if rendered and path.endswith(rendered):
+        return path[:len(path) - len(rendered)] + template
+    return template
+
+
+def record_cache_lookup(key: str, hit: bool, count: int = 1):
+    if settings.METRICS_ENABLED and count:
+        CACHE_LOOKUPS.labels(key.split(":", 1)[0], "hit" if hit else "miss").inc(count)
+
+
+def record_token_cache_lookup(hit: bool):
+    if settings.METRICS_ENABLED:
+        TOKEN_CACHE_LOOKUPS.labels("hit" if hit else "miss").inc()
+
+
+def record_token_cache_removal(reason: str, count: int, size: int):
+    if settings.METRICS_ENABLED:
+        if count:
+            TOKEN_CACHE_REMOVALS.labels(reason).inc(count)
+        TOKEN_CACHE_SIZE.set(size)
+
+
+def record_breaker_state(name: str, is_open: bool, degraded_seconds: float = 0.0):
+    if settings.METRICS_ENABLED:
+        CIRCUIT_BREAKER_OPEN.labels(name).set(1 if is_open else 0)
+        if is_open:
+            CIRCUIT_BREAKER_OPENS.labels(name).inc()
+        elif degraded_seconds:
+            CIRCUIT_BREAKER_DEGRADED.labels(name).inc(degraded_seconds)
+
+
+def record_image_stages(operation: str, stages: dict):
+    if settings.METRICS_ENABLED:
+        for stage, seconds in stages.items():
+            IMAGE_STAGE_DURATION.labels(operation, stage).observe(seconds)
+
+
+def record_image_memory(operation: str, predicted: Optional[int], measured: Optional[int]):
+    if settings.METRICS_ENABLED:
+        if predicted is not None:
+            IMAGE_PEAK_MEMORY.labels(operation, "predicted").observe(predicted)
+        if measured is not None:
+            IMAGE_PEAK_MEMORY.labels(operation, "measured").observe(measured)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_LATENCY.labels(
+                scope["method"],
+                route_template(scope) or "unmatched",
+                str(status_code)
+            ).observe(time.perf_counter() - started)
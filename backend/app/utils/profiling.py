@@ -0,0 +1,258 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs
+from fastapi import HTTPException, status
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from app.config.database import SessionLocal
+from app.config.logging_config import get_logger
+from app.config.settings import settings
+from app.utils.cache import cache_service
+
+logger = get_logger("profiling")
+
+PROFILE_FORMATS = {"pstats": ".prof", "collapsed": ".collapsed"}
+_RATE_LIMIT_KEY = "profiling:rate"
+
+
+def profile_dir() -> Path:
+    return Path(settings.PROFILING_DIR)
+
+
+def profile_path(profile_id: str) -> Optional[Path]:
+    for extension in PROFILE_FORMATS.values():
+        path = profile_dir() / f"{profile_id}{extension}"
+        if path.is_file():
+            return path
+    return None
+
+
+def list_profiles() -> list[dict]:
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for path in sorted(directory.iterdir(), key=lambda p: p.stat().st_mtime, reverse=True):
+        if path.suffix in PROFILE_FORMATS.values():
+            meta = path.with_suffix(path.suffix + ".meta")
+            profiles.append({
+                "id": path.stem,
+                "format": "pstats" if path.suffix == ".prof" else "collapsed",
+                "request": meta.read_text() if meta.is_file() else None,
+                "size": path.stat().st_size,
+                "created_at": datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec="seconds"),
+            })
+    return profiles
+
+
+def _prune():
+    profiles = list_profiles()
+    for profile in profiles[settings.PROFILING_MAX_STORED:]:
+        for path in profile_dir().glob(f"{profile['id']}.*"):
+            path.unlink(missing_ok=True)
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval, while resumed, and counts collapsed stacks."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.active = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.active:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def resume(self):
+        self.active = True
+
+    def pause(self):
+        self.active = False
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class _OwnSteps:
+    """Awaits a coroutine and calls enter/leave around each of its steps.
+
+    The event loop interleaves other requests between those steps; they run outside enter/leave and stay out of
+    the profile. Tasks the request spawns itself (asyncio.gather, create_task) are left out as well.
+    """
+
+    def __init__(self, coroutine, enter, leave):
+        self.coroutine = coroutine
+        self.enter = enter
+        self.leave = leave
+
+    def __await__(self):
+        step, value = self.coroutine.send, None
+        while True:
+            self.enter()
+            try:
+                signal = step(value)
+            except StopIteration as e:
+                return e.value
+            finally:
+                self.leave()
+            try:
+                value = yield signal
+                step = self.coroutine.send
+            except BaseException as e:
+                step, value = self.coroutine.throw, e
+
+
+class _RateLimiter:
+    def __init__(self):
+        self._last = 0.0
+        self._active = False
+
+    async def acquire(self) -> Optional[float]:
+        """Returns None when the caller may profile, otherwise seconds until the next slot."""
+        now = time.monotonic()
+        retry_after = self._last + settings.PROFILING_MIN_INTERVAL - now
+        if self._active or retry_after > 0:
+            return max(retry_after, 1.0)
+        self._active = True
+        if not await cache_service.reserve(_RATE_LIMIT_KEY, settings.PROFILING_MIN_INTERVAL):
+            self._active = False
+            return settings.PROFILING_MIN_INTERVAL
+        self._last = now
+        return None
+
+    def release(self):
+        self._active = False
+
+
+rate_limiter = _RateLimiter()
+
+
+def _requested_format(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return value.decode("latin-1").strip().lower() or "pstats"
+    if b"profile=" in scope.get("query_string", b""):
+        values = parse_qs(scope["query_string"].decode("latin-1")).get("profile")
+        if values:
+            return values[0].strip().lower() or "pstats"
+    return None
+
+
+async def _authorize(scope):
+    from app.utils.dependencies import get_current_admin_user, get_current_user
+
+    token = None
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, credentials = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer":
+                token = credentials.strip()
+            break
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    async with SessionLocal() as db:
+        return await get_current_admin_user(await get_current_user(token, db))
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        profile_format = _requested_format(scope) if scope["type"] == "http" else None
+        if profile_format is None or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        if profile_format in ("1", "true"):
+            profile_format = "pstats"
+        if profile_format not in PROFILE_FORMATS:
+            await JSONResponse(
+                {"detail": f"Unknown profile format, expected one of: {', '.join(PROFILE_FORMATS)}"},
+                status_code=status.HTTP_400_BAD_REQUEST
+            )(scope, receive, send)
+            return
+        try:
+            admin = await _authorize(scope)
+        except HTTPException as e:
+            await JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)(scope, receive, send)
+            return
+
+        retry_after = await rate_limiter.acquire()
+        if retry_after is not None:
+            logger.info("Profiling request from %s rejected by the rate limit", admin.username)
+            await JSONResponse(
+                {"detail": "Profiling rate limit reached"},
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(int(retry_after + 0.999))}
+            )(scope, receive, send)
+            return
+
+        profile_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        description = f"{scope['method']} {scope['path']}"
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Profile-Id", profile_id)
+                headers.append("X-Profile-Url", f"/api/v1/admin/profiles/{profile_id}")
+            await send(message)
+
+        logger.info("Profiling %s for admin %s (%s, id %s)", description, admin.username, profile_format, profile_id)
+        try:
+            if profile_format == "pstats":
+                profiler = cProfile.Profile()
+                try:
+                    await _OwnSteps(self.app(scope, receive, send_with_profile_id), profiler.enable, profiler.disable)
+                finally:
+                    self._store(profile_id, description, lambda path: profiler.dump_stats(path), profile_format)
+            else:
+                sampler = StackSampler(threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL)
+                sampler.start()
+                try:
+                    await _OwnSteps(self.app(scope, receive, send_with_profile_id), sampler.resume, sampler.pause)
+                finally:
+                    sampler.stop()
+                    self._store(profile_id, description, lambda path: Path(path).write_text(sampler.collapsed()), profile_format)
+        finally:
+            rate_limiter.release()
+
+    @staticmethod
+    def _store(profile_id: str, description: str, write, profile_format: str):
+        try:
+            directory = profile_dir()
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"{profile_id}{PROFILE_FORMATS[profile_format]}"
+            write(str(path))
+            path.with_suffix(path.suffix + ".meta").write_text(description)
+            _prune()
+        except OSError as e:
+            logger.error("Could not store profile %s: %s", profile_id, e)
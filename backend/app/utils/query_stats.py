@@ -0,0 +1,121 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from app.config.settings import settings
+from app.config.logging_config import get_logger
+from app.utils.metrics import route_template
+
+logger = get_logger("query_stats")
+
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+))*\s*\)")
+_NUMBERED_PLACEHOLDER = re.compile(r"\$\d+")
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    shape = _PLACEHOLDER_LIST.sub("(?)", statement)
+    shape = _NUMBERED_PLACEHOLDER.sub("?", shape)
+    return " ".join(shape.split())
+
+
+def _shorten(statement: Optional[str], limit: int = 300) -> str:
+    if statement is None:
+        return ""
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+
+class QueryStats:
+    __slots__ = ("count", "total_seconds", "slowest_seconds", "slowest_statement", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+        self.statements = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.total_seconds += seconds
+        self.statements[statement] += 1
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        if self.count <= threshold:
+            return []
+        shapes = Counter()
+        for statement, count in self.statements.items():
+            shapes[statement_shape(statement)] += count
+        return [(shape, count) for shape, count in shapes.most_common() if count > threshold]
+
+
+def get_current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_stats.get() is not None:
+        context._query_stats_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = getattr(context, "_query_stats_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def _route_label(scope) -> str:
+    return f"{scope.get('method')} {route_template(scope) or scope.get('path')}"
+
+
+def _report(scope, stats: QueryStats):
+    if not stats.count:
+        return
+    label = _route_label(scope)
+    total_ms = stats.total_seconds * 1000
+    if stats.count > settings.SQL_SLOW_REQUEST_QUERY_COUNT or total_ms > settings.SQL_SLOW_REQUEST_TIME_MS:
+        logger.warning(
+            "%s: %s queries, %.1f ms in the database, slowest %.1f ms: %s",
+            label, stats.count, total_ms, stats.slowest_seconds * 1000, _shorten(stats.slowest_statement)
+        )
+    for shape, count in stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD):
+        logger.warning("Possible N+1 in %s: statement executed %s times: %s", label, count, _shorten(shape))
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.SQL_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = MutableHeaders(scope=message)
+                headers.append("X-DB-Query-Count", str(stats.count))
+                headers.append("X-DB-Time-Ms", f"{stats.total_seconds * 1000:.1f}")
+                headers.append("X-DB-Slowest-Ms", f"{stats.slowest_seconds * 1000:.1f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_stats.reset(token)
+            _report(scope, stats)
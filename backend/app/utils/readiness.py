@@ -0,0 +1,66 @@
+import asyncio
+import time
+import weakref
+from sqlalchemy import text
+from app.config.database import SessionLocal
+from app.config.logging_config import get_logger
+from app.config.settings import settings
+from app.utils.cache import cache_service
+
+logger = get_logger("readiness")
+
+
+async def _ping_database():
+    async with SessionLocal() as db:
+        await db.execute(text("SELECT 1"))
+
+
+class ReadinessProbe:
+    """Checks the database and Redis with a short timeout and caches the result, so frequent probes stay cheap."""
+
+    def __init__(self):
+        self._result = None
+        self._checked_at = 0.0
+        self._locks = weakref.WeakKeyDictionary()
+
+    def _fresh(self) -> bool:
+        return self._result is not None and time.monotonic() - self._checked_at < settings.READINESS_CACHE_TTL
+
+    def _get_lock(self) -> asyncio.Lock:
+        """Returns the running loop's lock; the probe is a module global, so the lock cannot be created in __init__."""
+        loop = asyncio.get_running_loop()
+        lock = self._locks.get(loop)
+        if lock is None:
+            lock = self._locks[loop] = asyncio.Lock()
+        return lock
+
+    async def _check_database(self) -> bool:
+        try:
+            await asyncio.wait_for(_ping_database(), settings.READINESS_TIMEOUT)
+            return True
+        except Exception as e:
+            logger.warning("Readiness check: database unavailable: %s %s", type(e).__name__, e)
+            return False
+
+    async def _check_redis(self) -> bool:
+        available = await cache_service.ping(settings.READINESS_TIMEOUT)
+        if not available:
+            logger.warning("Readiness check: Redis unavailable")
+        return available
+
+    async def check(self) -> dict:
+        if self._fresh():
+            return self._result
+        async with self._get_lock():
+            if not self._fresh():
+                database, redis_available = await asyncio.gather(self._check_database(), self._check_redis())
+                self._result = {
+                    "ready": database and (redis_available or not settings.READINESS_REQUIRE_REDIS),
+                    "database": "ok" if database else "unavailable",
+                    "redis": "ok" if redis_available else "unavailable",
+                }
+                self._checked_at = time.monotonic()
+        return self._result
+
+
+readiness_probe = ReadinessProbe()
@@ -1,24 +1,84 @@
+import asyncio
+import weakref
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from typing import Optional
 from app.config.settings import settings
+from app.utils.token_cache import token_cache
+from app.config.logging_config import get_logger
+from app.utils.tracing import in_current_context
 
+logger = get_logger("security")
 
-def hash_password(password: str) -> str:
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+# One semaphore per event loop, created on first use: asyncio primitives must not be bound at import time.
+_password_slots = weakref.WeakKeyDictionary()
+
+
+def _get_password_slots() -> asyncio.BoundedSemaphore:
+    loop = asyncio.get_running_loop()
+    slots = _password_slots.get(loop)
+    if slots is None:
+        slots = _password_slots[loop] = asyncio.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+    return slots
+
+
+async def _run_password_task(func, *args):
+    slots = _get_password_slots()
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("Password hashing capacity exhausted, shedding request")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent authentication requests, please retry",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor, in_current_context(func), *args)
+    finally:
+        slots.release()
+
+
+def _hashpw(password: str, rounds: int) -> str:
     return bcrypt.hashpw(
         bytes(password, encoding="utf-8"),
-        bcrypt.gensalt(),
+        bcrypt.gensalt(rounds=rounds),
     ).decode("utf-8")
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def _checkpw(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(
         bytes(plain_password, encoding="utf-8"),
         bytes(hashed_password, encoding="utf-8"),
     )
 
 
+async def hash_password(password: str) -> str:
+    return await _run_password_task(_hashpw, password, settings.BCRYPT_ROUNDS)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_task(_checkpw, plain_password, hashed_password)
+
+
+def get_password_cost(hashed_password: str) -> Optional[int]:
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    return get_password_cost(hashed_password) != settings.BCRYPT_ROUNDS
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -31,9 +91,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def decode_access_token(token: str):
+def decode_access_token(token: str, use_cache: bool = True):
+    use_cache = use_cache and settings.TOKEN_CACHE_ENABLED
+    if use_cache:
+        cached = token_cache.get(token, settings.SECRET_KEY)
+        if cached is not None:
+            return cached
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
         return None
+    
+    if use_cache:
+        token_cache.set(token, payload, settings.SECRET_KEY)
+    return payload
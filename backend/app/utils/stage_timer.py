@@ -0,0 +1,35 @@
+import time
+from contextlib import contextmanager
+from app.utils.tracing import span
+
+
+class StageTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            with span(f"image.{name}"):
+                yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        entries.append(f"total;dur={self.total * 1000:.1f}")
+        return ", ".join(entries)
+
+    def log_fields(self) -> str:
+        fields = [f"{name}_ms={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        fields.append(f"total_ms={self.total * 1000:.1f}")
+        return " ".join(fields)
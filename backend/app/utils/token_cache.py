@@ -0,0 +1,110 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from app.config.settings import settings
+from app.config.logging_config import get_logger
+from app.utils.metrics import record_token_cache_lookup, record_token_cache_removal
+
+logger = get_logger("token_cache")
+
+
+class TokenCache:
+    def __init__(self, max_size: int = 10000, flush_on_key_rotation: bool = True):
+        self.max_size = max_size
+        self.flush_on_key_rotation = flush_on_key_rotation
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_fingerprint = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.flushes = 0
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _fingerprint(secret_key: str) -> str:
+        return hashlib.sha256(secret_key.encode("utf-8")).hexdigest()
+
+    def _check_key_rotation(self, secret_key: str):
+        fingerprint = self._fingerprint(secret_key)
+        if self._key_fingerprint == fingerprint:
+            return
+        if self._key_fingerprint is not None and self.flush_on_key_rotation:
+            removed = len(self._entries)
+            self._entries.clear()
+            self.flushes += 1
+            record_token_cache_removal("flush", removed, 0)
+            logger.info("Token cache flushed after secret key rotation")
+        self._key_fingerprint = fingerprint
+
+    def get(self, token: str, secret_key: str) -> Optional[dict]:
+        digest = self._digest(token)
+        with self._lock:
+            self._check_key_rotation(secret_key)
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                record_token_cache_lookup(hit=False)
+                return None
+            payload, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[digest]
+                self.expirations += 1
+                self.misses += 1
+                record_token_cache_lookup(hit=False)
+                record_token_cache_removal("expiration", 1, len(self._entries))
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            record_token_cache_lookup(hit=True)
+            return dict(payload)
+
+    def set(self, token: str, payload: dict, secret_key: str):
+        exp = payload.get("exp")
+        expires_at = float(exp) if isinstance(exp, (int, float)) else None
+        if expires_at is not None and expires_at <= time.time():
+            return
+        digest = self._digest(token)
+        with self._lock:
+            self._check_key_rotation(secret_key)
+            self._entries[digest] = (dict(payload), expires_at)
+            self._entries.move_to_end(digest)
+            evicted = 0
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                evicted += 1
+            self.evictions += evicted
+            record_token_cache_removal("eviction", evicted, len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self.flushes += 1
+            record_token_cache_removal("flush", removed, 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "flushes": self.flushes,
+            }
+
+
+token_cache = TokenCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    flush_on_key_rotation=settings.TOKEN_CACHE_FLUSH_ON_KEY_ROTATION
+)
@@ -0,0 +1,246 @@
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from app.config.logging_config import get_logger
+from app.config.settings import settings
+from app.utils.metrics import route_template
+
+logger = get_logger("tracing")
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Trace:
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or f"{random.getrandbits(128):032x}"
+        self.spans = []
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start", "started", "duration", "error")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str] = None, attributes: Optional[dict] = None):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes or {}
+        self.start = time.time()
+        self.started = time.perf_counter()
+        self.duration = None
+        self.error = None
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+        self.trace.spans.append(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+@contextmanager
+def span(name: str, **attributes):
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+
+def traced(name: str):
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return await func(*args, **kwargs)
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_methods(cls):
+    """Wraps every public method of a class in a span; a no-op unless tracing is enabled at import time."""
+    if not settings.TRACING_ENABLED:
+        return cls
+    for name, member in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.isfunction(member):
+            setattr(cls, name, traced(f"{cls.__name__}.{name}")(member))
+    return cls
+
+
+class TracedRoute(APIRoute):
+    """Runs each endpoint in a span named after its controller and handler, e.g. plan_controller.get_all_plans."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        # include_router rebuilds every route with the same class, so an endpoint is wrapped only once.
+        if settings.TRACING_ENABLED and not getattr(endpoint, "_traced_route", False):
+            endpoint = traced(f"{endpoint.__module__.rpartition('.')[2]}.{endpoint.__name__}")(endpoint)
+            endpoint._traced_route = True
+        super().__init__(path, endpoint, **kwargs)
+
+
+def in_current_context(func):
+    """Binds func to a copy of the caller's context so spans (and request ids) follow it into executor threads."""
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+class ConsoleExporter:
+    def export(self, trace: Trace):
+        spans = sorted(trace.spans, key=lambda s: s.started)
+        children = {}
+        for item in spans:
+            children.setdefault(item.parent_id, []).append(item)
+        lines = []
+
+        def render(item, depth):
+            error = f" ERROR {item.error}" if item.error else ""
+            lines.append(f"{'  ' * depth}{item.name} {item.duration * 1000:.2f} ms{error}")
+            for child in children.get(item.span_id, []):
+                render(child, depth + 1)
+
+        known = {item.span_id for item in spans}
+        for root in [item for item in spans if item.parent_id not in known]:
+            render(root, 0)
+        logger.info("Trace %s\n%s", trace.trace_id, "\n".join(lines))
+
+
+class FileExporter:
+    """Appends one JSON line per span from a background thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def export(self, trace: Trace):
+        self._queue.put(trace)
+
+    def _run(self):
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", buffering=1) as f:
+            while True:
+                trace = self._queue.get()
+                if trace is None:
+                    return
+                f.write("".join(json.dumps(item.to_dict(), default=str) + "\n" for item in trace.spans))
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+
+_exporter = None
+
+
+def get_exporter():
+    global _exporter
+    if _exporter is None:
+        if settings.TRACING_EXPORTER == "console":
+            _exporter = ConsoleExporter()
+        else:
+            _exporter = FileExporter(settings.TRACING_FILE)
+    return _exporter
+
+
+if settings.TRACING_ENABLED:
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _start_query_span(conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get()
+        if parent is not None and context is not None:
+            context._trace_span = Span(parent.trace, "SQL", parent.span_id, {"statement": statement[:300]})
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _finish_query_span(conn, cursor, statement, parameters, context, executemany):
+        query_span = getattr(context, "_trace_span", None)
+        if query_span is not None:
+            query_span.finish()
+            context._trace_span = None
+
+
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.TRACING_ENABLED or random.random() >= settings.TRACING_SAMPLE_RATE:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = parent_id = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                match = _TRACEPARENT.match(value.decode("latin-1").strip())
+                if match:
+                    trace_id, parent_id = match.groups()
+                break
+        root = Span(Trace(trace_id), f"{scope['method']} {scope['path']}", parent_id)
+        token = _current_span.set(root)
+
+        async def send_with_traceparent(message):
+            if message["type"] == "http.response.start":
+                root.attributes["status"] = message["status"]
+                MutableHeaders(scope=message).append("traceparent", f"00-{root.trace.trace_id}-{root.span_id}-01")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_traceparent)
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            root.name = f"{scope['method']} {route_template(scope) or scope['path']}"
+            root.finish()
+            try:
+                get_exporter().export(root.trace)
+            except Exception as e:
+                logger.error("Trace export failed: %s", e)
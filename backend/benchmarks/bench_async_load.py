@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import os
+import ssl
+import time
+import httpx
+
+DEFAULT_ROUTES = [
+    "/api/v1/plans/",
+    "/api/v1/subscriptions/plans",
+    "/api/v1/users/me",
+    "/api/v1/subscriptions/my-subscription",
+]
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, int(len(samples) * fraction))
+    return samples[index]
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> dict:
+    response = await client.post("/api/v1/auth/login", data={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def process_cpu_seconds(pid: int) -> float:
+    """User plus system CPU time of a local process, from /proc (Linux only)."""
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def worker(args, ssl_context: ssl.SSLContext, routes: list[str], headers: dict, deadline: float, offset: int, results: dict):
+    # One connection per client: a single shared pool rescans every connection on each request,
+    # which at hundreds of clients costs the load generator more CPU than the server spends.
+    limits = httpx.Limits(max_connections=1, max_keepalive_connections=1)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout, verify=ssl_context) as client:
+        index = offset
+        while time.perf_counter() < deadline:
+            route = routes[index % len(routes)]
+            index += 1
+            start = time.perf_counter()
+            try:
+                response = await client.get(route, headers=headers)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            elapsed = time.perf_counter() - start
+            results.setdefault(route, []).append(elapsed)
+            if not ok:
+                results["errors"] = results.get("errors", 0) + 1
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+        headers = await login(client, args.username, args.password) if args.username else {}
+        routes = args.route or DEFAULT_ROUTES
+        if not headers:
+            routes = [route for route in routes if "/me" not in route and "my-" not in route]
+
+        if args.warmup:
+            await asyncio.gather(*[client.get(route, headers=headers) for route in routes])
+
+    results = {}
+    ssl_context = ssl.create_default_context()
+    server_cpu = process_cpu_seconds(args.server_pid) if args.server_pid else None
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*[
+        worker(args, ssl_context, routes, headers, deadline, offset, results)
+        for offset in range(args.clients)
+    ])
+    elapsed = time.perf_counter() - started
+    if server_cpu is not None:
+        server_cpu = process_cpu_seconds(args.server_pid) - server_cpu
+
+    errors = results.pop("errors", 0)
+    all_samples = sorted(sample for samples in results.values() for sample in samples)
+    print(f"{args.clients} clients, {elapsed:.1f}s, {len(all_samples)} requests, {errors} errors")
+    print(f"{'route':<40} {'requests':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for route, samples in sorted(results.items()):
+        samples.sort()
+        print(f"{route:<40} {len(samples):>9} {percentile(samples, 0.5) * 1000:>9.1f} {percentile(samples, 0.99) * 1000:>9.1f}")
+    print(f"{'total':<40} {len(all_samples):>9} {percentile(all_samples, 0.5) * 1000:>9.1f} {percentile(all_samples, 0.99) * 1000:>9.1f}")
+    print(f"throughput: {len(all_samples) / elapsed:.1f} req/s")
+    if server_cpu is not None and all_samples:
+        print(f"server cpu: {server_cpu:.1f}s, {server_cpu * 1000 / len(all_samples):.2f} ms/request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent load against a running API: requests per second and p99 latency")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--username", help="Log in as this user to include authenticated routes")
+    parser.add_argument("--password")
+    parser.add_argument("--route", action="append", help="Route to request (repeatable); defaults to the catalog and profile routes")
+    parser.add_argument("--server-pid", type=int, help="Also report the server process's CPU time per request (Linux only)")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false", help="Skip the initial request per route")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,78 @@
+import argparse
+import time
+from datetime import datetime, timedelta
+from app.schemas.subscription import SubscriptionResponse
+from app.schemas.user import UserWithSubscription
+from app.utils.codecs import CODECS, CacheSerializer
+
+
+def build_payloads():
+    now = datetime.now()
+    subscription = SubscriptionResponse(
+        id=42,
+        user_id=7,
+        plan_id=2,
+        operations_used=13,
+        start_date=now,
+        end_date=now + timedelta(days=30),
+        is_active=True,
+        plan_name="BASIC",
+        max_operations=50,
+        operations_remaining=37
+    )
+    user = UserWithSubscription(
+        id=7,
+        email="jane.doe@example.com",
+        username="jane.doe",
+        role="user",
+        is_active=True,
+        created_at=now,
+        current_plan="BASIC",
+        operations_used=13,
+        operations_remaining=37
+    )
+    admin_listing = [
+        user.model_copy(update={"id": i, "username": f"user{i}", "email": f"user{i}@example.com"}).model_dump()
+        for i in range(100)
+    ]
+    return {
+        "SubscriptionResponse": {"v": subscription.model_dump(), "exp": time.time() + 300, "delta": 0.002},
+        "UserWithSubscription": {"v": user.model_dump(), "exp": time.time() + 300, "delta": 0.002},
+        "UserWithSubscription x100": admin_listing,
+    }
+
+
+def measure(serializer: CacheSerializer, payload, iterations: int):
+    encoded = serializer.dumps(payload)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        serializer.dumps(payload)
+    encode = (time.perf_counter() - start) / iterations
+    start = time.perf_counter()
+    for _ in range(iterations):
+        serializer.loads(encoded)
+    decode = (time.perf_counter() - start) / iterations
+    return len(encoded), encode, decode
+
+
+def run(iterations: int, threshold: int):
+    payloads = build_payloads()
+    print(f"{'payload':<28}{'codec':<10}{'compress':<10}{'bytes':>8}{'encode us':>12}{'decode us':>12}")
+    for payload_name, payload in payloads.items():
+        for codec in CODECS:
+            for compression_threshold in (0, threshold):
+                serializer = CacheSerializer(codec=codec, compression_threshold=compression_threshold)
+                if serializer.codec.name != codec:
+                    print(f"{payload_name:<28}{codec:<10}not installed")
+                    break
+                size, encode, decode = measure(serializer, payload, iterations)
+                label = f">{compression_threshold}B" if compression_threshold else "off"
+                print(f"{payload_name:<28}{codec:<10}{label:<10}{size:>8}{encode * 1e6:>12.2f}{decode * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cache codec size and encode/decode time for real response payloads")
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--threshold", type=int, default=1024, help="Compression threshold in bytes")
+    args = parser.parse_args()
+    run(args.iterations, args.threshold)
@@ -0,0 +1,94 @@
+import argparse
+import time
+import redis
+
+PLAN_NAMES = ["FREE", "BASIC", "PREMIUM", "ENTERPRISE"]
+
+
+def connect(args):
+    if args.fake:
+        import fakeredis
+        return fakeredis.FakeRedis(decode_responses=True)
+    return redis.Redis(host=args.host, port=args.port, db=args.db, decode_responses=True)
+
+
+def seed_unrelated(client, count: int):
+    pipe = client.pipeline(transaction=False)
+    for i in range(count):
+        pipe.set(f"bench:unrelated:{i}", "x")
+        if i % 10000 == 9999:
+            pipe.execute()
+    pipe.execute()
+
+
+def seed_plans(client, tagged: bool):
+    pipe = client.pipeline(transaction=False)
+    for name in PLAN_NAMES:
+        pipe.set(f"plan:name:{name}", "{}", ex=600)
+        if tagged:
+            pipe.sadd("cache:tag:plan:name", f"plan:name:{name}")
+    pipe.execute()
+
+
+def timed(label: str, func, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    print(f"{label:<28} median {samples[len(samples) // 2] * 1000:9.3f} ms   max {samples[-1] * 1000:9.3f} ms")
+
+
+def invalidate_keys(client):
+    seed_plans(client, tagged=False)
+    keys = client.keys("plan:name:*")
+    if keys:
+        client.delete(*keys)
+
+
+def invalidate_scan(client, batch_size: int):
+    seed_plans(client, tagged=False)
+    batch = []
+    for key in client.scan_iter(match="plan:name:*", count=batch_size):
+        batch.append(key)
+    if batch:
+        client.unlink(*batch)
+
+
+def invalidate_tag(client):
+    seed_plans(client, tagged=True)
+    members = list(client.smembers("cache:tag:plan:name"))
+    if members:
+        pipe = client.pipeline(transaction=False)
+        pipe.unlink(*members)
+        pipe.srem("cache:tag:plan:name", *members)
+        pipe.execute()
+
+
+def run(args):
+    client = connect(args)
+    client.flushdb()
+    print(f"seeding {args.keys} unrelated keys...")
+    seed_unrelated(client, args.keys)
+    print(f"dbsize={client.dbsize()}")
+
+    timed("KEYS plan:name:* (old)", lambda: invalidate_keys(client), args.repeat)
+    timed("SCAN plan:name:* fallback", lambda: invalidate_scan(client, args.scan_count), args.repeat)
+    timed("tag set invalidation", lambda: invalidate_tag(client), args.repeat)
+
+    if not args.keep:
+        client.flushdb()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plan cache invalidation cost with many unrelated keys in Redis")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--db", type=int, default=15, help="Redis database to use; it is flushed")
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scan-count", type=int, default=500)
+    parser.add_argument("--fake", action="store_true", help="Use fakeredis instead of a Redis server")
+    parser.add_argument("--keep", action="store_true", help="Do not flush the database afterwards")
+    run(parser.parse_args())
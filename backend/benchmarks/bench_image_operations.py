@@ -0,0 +1,218 @@
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime
+from PIL import Image, ImageChops
+import PIL
+from app.schemas.image import ImageOperation
+from app.services.image_service import ImageService
+from app.utils.image_memory import MemoryAccount
+from app.utils.stage_timer import StageTimer
+
+SIZES_MP = [0.3, 3, 12, 48]
+FORMATS = ["JPEG", "PNG", "WEBP"]
+MODES = ["RGB", "RGBA", "L", "P"]
+# Modes each encoder can store without a silent conversion.
+FORMAT_MODES = {"JPEG": {"RGB", "L"}, "PNG": {"RGB", "RGBA", "L", "P"}, "WEBP": {"RGB", "RGBA"}}
+
+
+class PeakRSS:
+    """Samples resident memory on a background thread; Pillow buffers are invisible to tracemalloc."""
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.baseline = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def _rss(self) -> int:
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * self._page_size
+        except OSError:
+            return 0
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._rss())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.baseline = self.peak = self._rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+
+    @property
+    def delta(self) -> int:
+        return max(0, self.peak - self.baseline)
+
+
+def synthetic_image(megapixels: float, mode: str, seed: int) -> Image.Image:
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = int(megapixels * 1_000_000 / width)
+    rng = random.Random(seed)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    channels = [gradient, gradient.rotate(90).resize((width, height)), gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)]
+    noise = Image.frombytes("L", (width, height), rng.randbytes(width * height)).point(lambda v: v // 6)
+    image = Image.merge("RGB", [ImageChops.add(channel, noise) for channel in channels])
+    if mode == "RGBA":
+        image.putalpha(gradient.transpose(Image.Transpose.FLIP_TOP_BOTTOM))
+    elif mode == "L":
+        image = image.convert("L")
+    elif mode == "P":
+        image = image.quantize(256)
+    return image
+
+
+def encode_source(image: Image.Image, fmt: str) -> bytes:
+    output = io.BytesIO()
+    options = {"quality": 90} if fmt in ("JPEG", "WEBP") else {}
+    image.save(output, format=fmt, **options)
+    return output.getvalue()
+
+
+def run_case(service: ImageService, data: bytes, operation: ImageOperation, repeat: int) -> dict:
+    walls = []
+    stages = {}
+    peak = 0
+    for _ in range(repeat):
+        timer = StageTimer()
+        memory = MemoryAccount()
+        with PeakRSS() as rss:
+            start = time.perf_counter()
+            service._transform(io.BytesIO(data), operation, {}, timer, start, memory)
+            walls.append(time.perf_counter() - start)
+        peak = max(peak, rss.delta)
+        for stage, seconds in timer.stages.items():
+            stages.setdefault(stage, []).append(seconds)
+    return {
+        "wall_s": statistics.median(walls),
+        "wall_min_s": min(walls),
+        "stages_s": {stage: statistics.median(values) for stage, values in stages.items() if stage != "queue"},
+        "peak_rss_bytes": peak,
+        "predicted_peak_bytes": memory.predicted,
+    }
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float, memory_tolerance: float, min_delta: float) -> int:
+    with open(baseline_path) as f:
+        baseline = {case["case"]: case for case in json.load(f)["results"]}
+    regressions = 0
+    print(f"\ncompared with {baseline_path} (time tolerance {tolerance:.0%}, memory tolerance {memory_tolerance:.0%})")
+    for case in results:
+        previous = baseline.get(case["case"])
+        if previous is None:
+            print(f"new   {case['case']}")
+            continue
+        if "error" in case or "error" in previous:
+            if "error" in case and "error" not in previous:
+                regressions += 1
+                print(f"WORSE {case['case']:<36} now fails: {case['error']}")
+            continue
+        time_ratio = case["wall_s"] / previous["wall_s"] if previous["wall_s"] else 1.0
+        memory_ratio = case["peak_rss_bytes"] / previous["peak_rss_bytes"] if previous["peak_rss_bytes"] else 1.0
+        slower = time_ratio > 1 + tolerance and case["wall_s"] - previous["wall_s"] > min_delta
+        bigger = memory_ratio > 1 + memory_tolerance and case["peak_rss_bytes"] - previous["peak_rss_bytes"] > 1024 * 1024
+        if slower or bigger:
+            regressions += 1
+            print(f"WORSE {case['case']:<36} time x{time_ratio:.2f}  memory x{memory_ratio:.2f}")
+        elif time_ratio < 1 - tolerance:
+            print(f"better {case['case']:<35} time x{time_ratio:.2f}  memory x{memory_ratio:.2f}")
+    missing = set(baseline) - {case["case"] for case in results}
+    if missing:
+        print(f"{len(missing)} baseline case(s) not run")
+    print(f"{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+def run(args) -> int:
+    service = ImageService(None)
+    operations = [ImageOperation(name) for name in args.operation] if args.operation else list(ImageOperation)
+    results = []
+    print(f"{'case':<36}{'wall ms':>10}{'MP/s':>9}{'peak MB':>9}{'model MB':>10}  stages ms (decode/transform/encode)")
+    for megapixels in args.size:
+        for mode in args.mode:
+            base = synthetic_image(megapixels, mode, args.seed)
+            for fmt in args.format:
+                if mode not in FORMAT_MODES[fmt]:
+                    continue
+                data = encode_source(base, fmt)
+                for operation in operations:
+                    name = f"{operation.value}/{megapixels}MP/{fmt}/{mode}"
+                    try:
+                        case = run_case(service, data, operation, args.repeat)
+                    except Exception as e:
+                        results.append({"case": name, "error": f"{type(e).__name__}: {e}"})
+                        print(f"{name:<36}  error: {type(e).__name__}: {e}")
+                        continue
+                    actual_mp = base.width * base.height / 1_000_000
+                    case.update({
+                        "case": name,
+                        "operation": operation.value,
+                        "megapixels": megapixels,
+                        "width": base.width,
+                        "height": base.height,
+                        "format": fmt,
+                        "mode": mode,
+                        "source_bytes": len(data),
+                        "throughput_mp_s": actual_mp / case["wall_s"] if case["wall_s"] else 0.0,
+                    })
+                    results.append(case)
+                    stages = "/".join(f"{case['stages_s'].get(stage, 0) * 1000:.1f}" for stage in ("decode", "transform", "encode"))
+                    print(f"{name:<36}{case['wall_s'] * 1000:>10.1f}{case['throughput_mp_s']:>9.1f}{case['peak_rss_bytes'] / 1048576:>9.1f}{case['predicted_peak_bytes'] / 1048576:>10.1f}  {stages}")
+                del data
+            del base
+
+    if args.output:
+        report = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {len(results)} cases to {args.output}")
+
+    if args.baseline:
+        return compare(results, args.baseline, args.tolerance, args.memory_tolerance, args.min_delta_ms / 1000)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every ImageService transform across input sizes, source formats and modes")
+    parser.add_argument("--size", type=float, action="append", help=f"Input size in megapixels (repeatable, default {SIZES_MP})")
+    parser.add_argument("--format", action="append", choices=FORMATS, help="Source format (repeatable, default all)")
+    parser.add_argument("--mode", action="append", choices=MODES, help="Source mode (repeatable, default all)")
+    parser.add_argument("--operation", action="append", choices=[op.value for op in ImageOperation], help="Operation (repeatable, default all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the median is reported")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a JSON file written by --output and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative wall-time increase")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignore wall-time increases smaller than this")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="Allowed relative peak-memory increase")
+    args = parser.parse_args()
+    args.size = args.size or SIZES_MP
+    args.format = args.format or FORMATS
+    args.mode = args.mode or MODES
+    sys.exit(run(args))
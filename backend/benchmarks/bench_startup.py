@@ -0,0 +1,63 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Unroutable address: connects hang until REDIS_CONNECT_TIMEOUT, like a slow or partitioned Redis.
+SLOW_REDIS_HOST = "10.255.255.1"
+
+
+def import_once(module: str, env: dict) -> tuple[float, list[tuple[int, int, str]]]:
+    """Imports the module in a fresh interpreter and returns its wall time plus the -X importtime rows."""
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {module}; "
+        "print(f'wall {time.perf_counter() - started:.6f}')"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=env
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    wall = float(next(line for line in completed.stdout.splitlines() if line.startswith("wall ")).split()[1])
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|", 2))
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    return wall, rows
+
+
+def run(args) -> int:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///startup-bench.db")
+    if args.redis == "slow":
+        env["REDIS_HOST"] = SLOW_REDIS_HOST
+    elif args.redis == "down":
+        env["REDIS_PORT"] = "1"
+
+    walls = []
+    rows = []
+    for _ in range(args.repeat):
+        wall, rows = import_once(args.module, env)
+        walls.append(wall)
+    print(f"import {args.module} (redis {args.redis}, {args.repeat} runs)")
+    print(f"wall ms: median {statistics.median(walls) * 1000:.1f}, min {min(walls) * 1000:.1f}, max {max(walls) * 1000:.1f}")
+
+    print(f"\nslowest modules by self time (last run):\n{'self ms':>9}{'cumul ms':>10}  module")
+    for self_us, cumulative_us, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"{self_us / 1000:>9.1f}{cumulative_us / 1000:>10.1f}  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how long importing the application takes in a fresh interpreter")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--redis", choices=["slow", "down", "env"], default="slow",
+                        help="slow: unroutable host; down: closed port; env: use REDIS_HOST/REDIS_PORT as set")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Modules to list by self time")
+    sys.exit(run(parser.parse_args()))
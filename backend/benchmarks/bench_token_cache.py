@@ -0,0 +1,41 @@
+import argparse
+import time
+from datetime import timedelta
+from app.config.settings import settings
+from app.utils.security import create_access_token, decode_access_token
+from app.utils.token_cache import token_cache
+
+
+def run(iterations: int, tokens: int):
+    issued = [
+        create_access_token(
+            data={"user_id": i, "username": f"user{i}", "role": "user"},
+            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
+        for i in range(tokens)
+    ]
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        decode_access_token(issued[i % tokens], use_cache=False)
+    uncached = time.perf_counter() - start
+
+    token_cache.clear()
+    start = time.perf_counter()
+    for i in range(iterations):
+        decode_access_token(issued[i % tokens], use_cache=True)
+    cached = time.perf_counter() - start
+
+    print(f"iterations={iterations} distinct_tokens={tokens}")
+    print(f"without cache: {uncached / iterations * 1e6:.2f} us/request")
+    print(f"with cache:    {cached / iterations * 1e6:.2f} us/request")
+    print(f"speedup:       {uncached / cached:.1f}x")
+    print(f"cache stats:   {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-request JWT decode overhead with and without the token cache")
+    parser.add_argument("--iterations", type=int, default=50000)
+    parser.add_argument("--tokens", type=int, default=100)
+    args = parser.parse_args()
+    run(args.iterations, args.tokens)
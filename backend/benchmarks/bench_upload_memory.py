@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import subprocess
+import sys
+from types import SimpleNamespace
+
+SIZES_MP = [3, 12]
+FORMATS = ["PNG", "JPEG"]
+OPERATIONS = ["grayscale", "resize"]
+CONTENT_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg"}
+
+
+async def measure(operation: str, megapixels: float, fmt: str) -> dict:
+    import httpx
+    from app.main import app
+    from app.utils.security import create_access_token
+    from benchmarks.bench_image_operations import PeakRSS, encode_source, synthetic_image
+    from benchmarks.load_harness import seed
+
+    logging.getLogger("app").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    user = (await seed(1, "bench-password"))[0]
+    headers = {"Authorization": f"Bearer {create_access_token({'user_id': user['id'], 'username': user['username'], 'role': user['role']})}"}
+    warmup = encode_source(synthetic_image(0.05, "RGB", 1), fmt)
+    image = synthetic_image(megapixels, "RGB", 0)
+    data = encode_source(image, fmt)
+    width, height = image.size
+    del image
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            async def upload(payload: bytes):
+                response = await client.post(
+                    "/api/v1/images/process",
+                    headers=headers,
+                    files={"file": (f"bench.{fmt.lower()}", payload, CONTENT_TYPES[fmt])},
+                    data={"operation": operation}
+                )
+                response.raise_for_status()
+                return response
+
+            await upload(warmup)
+            gc.collect()
+            with PeakRSS() as rss:
+                response = await upload(data)
+            return {
+                "case": f"{operation}/{megapixels}MP/{fmt}",
+                "operation": operation,
+                "megapixels": megapixels,
+                "width": width,
+                "height": height,
+                "format": fmt,
+                "upload_bytes": len(data),
+                "response_bytes": len(response.content),
+                "peak_rss_bytes": rss.delta,
+            }
+
+
+def run_isolated(operation: str, megapixels: float, fmt: str) -> dict:
+    """Each case runs in a fresh interpreter, since freed memory is not returned to the OS between requests."""
+    case = f"{operation}/{megapixels}MP/{fmt}"
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_upload_memory", "--case", f"{operation}/{megapixels}/{fmt}"],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        return {"case": case, "error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(results: list[dict], baseline_path: str, memory_tolerance: float) -> int:
+    with open(baseline_path) as f:
+        baseline = {case["case"]: case for case in json.load(f)["results"]}
+    regressions = 0
+    print(f"\ncompared with {baseline_path} (memory tolerance {memory_tolerance:.0%})")
+    for case in results:
+        previous = baseline.get(case["case"])
+        if previous is None or "error" in case or "error" in previous:
+            continue
+        ratio = case["peak_rss_bytes"] / previous["peak_rss_bytes"] if previous["peak_rss_bytes"] else 1.0
+        change = f"{previous['peak_rss_bytes'] / 1048576:.1f} -> {case['peak_rss_bytes'] / 1048576:.1f} MB (x{ratio:.2f})"
+        if ratio > 1 + memory_tolerance and case["peak_rss_bytes"] - previous["peak_rss_bytes"] > 1024 * 1024:
+            regressions += 1
+            print(f"WORSE  {case['case']:<28} {change}")
+        else:
+            print(f"{'better' if ratio < 1 else 'same':<6} {case['case']:<28} {change}")
+    print(f"{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+def run(args) -> int:
+    results = []
+    print(f"{'case':<28}{'upload MB':>11}{'response MB':>13}{'peak MB':>9}")
+    for megapixels in args.size:
+        for fmt in args.format:
+            for operation in args.operation:
+                case = run_isolated(operation, megapixels, fmt)
+                results.append(case)
+                if "error" in case:
+                    print(f"{case['case']:<28}  error: {case['error']}")
+                    continue
+                print(
+                    f"{case['case']:<28}{case['upload_bytes'] / 1048576:>11.1f}"
+                    f"{case['response_bytes'] / 1048576:>13.1f}{case['peak_rss_bytes'] / 1048576:>9.1f}"
+                )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+        print(f"\nwrote {len(results)} cases to {args.output}")
+    if args.baseline:
+        return compare(results, args.baseline, args.memory_tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure peak resident memory of one /images/process request through the full upload -> store -> respond path"
+    )
+    parser.add_argument("--size", type=float, action="append", help=f"Input size in megapixels (repeatable, default {SIZES_MP})")
+    parser.add_argument("--format", action="append", choices=FORMATS, help="Upload format (repeatable, default all)")
+    parser.add_argument("--operation", action="append", help=f"Operation (repeatable, default {OPERATIONS})")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a JSON file written by --output and exit 1 on regressions")
+    parser.add_argument("--memory-tolerance", type=float, default=0.1, help="Allowed relative peak-memory increase")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        operation, megapixels, fmt = args.case.split("/")
+        environment = SimpleNamespace(database_url=None, redis="fake", bcrypt_rounds=4)
+        from benchmarks.load_harness import configure_environment
+        configure_environment(environment)
+        from benchmarks.check_query_plans import migrate
+        migrate(environment.database_url)
+        print(json.dumps(asyncio.run(measure(operation, float(megapixels), fmt))))
+    else:
+        args.size = args.size or SIZES_MP
+        args.format = args.format or FORMATS
+        args.operation = args.operation or OPERATIONS
+        sys.exit(run(args))
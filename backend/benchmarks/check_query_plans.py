@@ -0,0 +1,207 @@
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import random
+import re
+import sys
+from datetime import datetime, timedelta
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.config.database import get_async_url
+from app.dal.image_dal import ImageDAL
+from app.dal.plan_dal import PlanDAL
+from app.dal.subscription_dal import SubscriptionDAL
+from app.dal.user_dal import UserDAL
+from app.models.image_record import ImageRecord
+from app.models.plan import Plan
+from app.models.subscription import Subscription
+from app.models.user import User
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+DAL_CLASSES = [UserDAL, PlanDAL, SubscriptionDAL, ImageDAL]
+SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+
+# Queries that read a whole (paginated) table by design; a sequential scan is the right plan.
+ALLOWED_SCANS = {
+    "UserDAL.get_all": {"users": "unfiltered admin listing, LIMIT/OFFSET over the whole table"},
+}
+
+
+def build_cases(sample: dict) -> dict:
+    user_id = sample["user_id"]
+    since = datetime.now() - timedelta(hours=24)
+    return {
+        "UserDAL.get_by_id": lambda db: UserDAL(db).get_by_id(user_id),
+        "UserDAL.get_by_email": lambda db: UserDAL(db).get_by_email(sample["email"]),
+        "UserDAL.get_by_username": lambda db: UserDAL(db).get_by_username(sample["username"]),
+        "UserDAL.get_all": lambda db: UserDAL(db).get_all(0, 100),
+        "UserDAL.get_ids": lambda db: UserDAL(db).get_ids(0, 100),
+        "UserDAL.get_by_ids": lambda db: UserDAL(db).get_by_ids(sample["user_ids"]),
+        "PlanDAL.get_by_id": lambda db: PlanDAL(db).get_by_id(sample["plan_id"]),
+        "PlanDAL.get_by_name": lambda db: PlanDAL(db).get_by_name("BASIC"),
+        "PlanDAL.get_all": lambda db: PlanDAL(db).get_all(),
+        "SubscriptionDAL.get_by_id": lambda db: SubscriptionDAL(db).get_by_id(sample["subscription_id"]),
+        "SubscriptionDAL.get_active_by_user_id": lambda db: SubscriptionDAL(db).get_active_by_user_id(user_id),
+        "SubscriptionDAL.get_active_by_user_ids": lambda db: SubscriptionDAL(db).get_active_by_user_ids(sample["user_ids"]),
+        "SubscriptionDAL.get_all_by_user_id": lambda db: SubscriptionDAL(db).get_all_by_user_id(user_id),
+        "ImageDAL.get_by_id": lambda db: ImageDAL(db).get_by_id(sample["image_id"]),
+        "ImageDAL.get_all_by_user_id": lambda db: ImageDAL(db).get_all_by_user_id(user_id),
+        "ImageDAL.count_by_user_id": lambda db: ImageDAL(db).count_by_user_id(user_id),
+        "ImageDAL.get_recent_user_ids": lambda db: ImageDAL(db).get_recent_user_ids(since, limit=100),
+    }
+
+
+def read_methods() -> list[str]:
+    names = []
+    for dal_class in DAL_CLASSES:
+        for name, member in inspect.getmembers(dal_class, inspect.iscoroutinefunction):
+            if name.startswith(("get_", "count_")):
+                names.append(f"{dal_class.__name__}.{name}")
+    return names
+
+
+def migrate(url: str):
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+
+async def seed(engine, users: int, history: int, images: int):
+    async with engine.begin() as conn:
+        if await conn.scalar(select(func.count()).select_from(User)):
+            print("database already has users, skipping seed")
+            return
+        plan_ids = list((await conn.scalars(select(Plan.id))).all())
+        now = datetime.now()
+        print(f"seeding {users} users, {users * (history + 1)} subscriptions, {users * images} image records...")
+        await conn.execute(insert(User), [
+            {"email": f"user{i}@example.com", "username": f"user{i}", "hashed_password": "x", "role": "user", "is_active": True}
+            for i in range(users)
+        ])
+        user_ids = list((await conn.scalars(select(User.id))).all())
+        subscriptions = []
+        records = []
+        for user_id in user_ids:
+            for age in range(history, -1, -1):
+                start = now - timedelta(days=30 * age)
+                subscriptions.append({
+                    "user_id": user_id,
+                    "plan_id": random.choice(plan_ids),
+                    "operations_used": 0,
+                    "start_date": start,
+                    "end_date": start + timedelta(days=30),
+                    "is_active": age == 0,
+                })
+            for _ in range(images):
+                records.append({
+                    "user_id": user_id,
+                    "filename": "seed.png",
+                    "operation": "grayscale",
+                    "original_size": "64x64",
+                    "processed_size": "64x64",
+                    "created_at": now - timedelta(minutes=random.randint(0, 60 * 24 * 90)),
+                })
+        await conn.execute(insert(Subscription), subscriptions)
+        await conn.execute(insert(ImageRecord), records)
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+
+
+async def load_sample(engine) -> dict:
+    async with engine.connect() as conn:
+        user = (await conn.execute(select(User.id, User.email, User.username).order_by(User.id.desc()).limit(1))).one()
+        return {
+            "user_id": user.id,
+            "email": user.email,
+            "username": user.username,
+            "user_ids": list((await conn.scalars(select(User.id).limit(50))).all()),
+            "plan_id": await conn.scalar(select(Plan.id).limit(1)),
+            "subscription_id": await conn.scalar(select(Subscription.id).where(Subscription.user_id == user.id).limit(1)),
+            "image_id": await conn.scalar(select(ImageRecord.id).where(ImageRecord.user_id == user.id).limit(1)),
+        }
+
+
+async def explain(conn, dialect: str, statement: str, parameters) -> list[str]:
+    if dialect == "postgresql":
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        raw = result.scalar()
+        plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+        scans = []
+        nodes = [plan]
+        while nodes:
+            node = nodes.pop()
+            if node.get("Node Type") == "Seq Scan":
+                scans.append(node["Relation Name"])
+            nodes.extend(node.get("Plans", []))
+        return scans
+    if dialect == "sqlite":
+        result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [match.group(1) for row in result if (match := SQLITE_SCAN.match(row[-1]))]
+    raise ValueError(f"EXPLAIN parsing is not implemented for {dialect}")
+
+
+async def check(args) -> int:
+    engine = create_async_engine(get_async_url(args.url))
+    dialect = engine.dialect.name
+    if args.seed:
+        await seed(engine, args.users, args.history, args.images)
+    sample = await load_sample(engine)
+    cases = build_cases(sample)
+
+    missing = [name for name in read_methods() if name not in cases]
+    captured = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    table_rows = {}
+    failures = 0
+    for name, run in cases.items():
+        captured.clear()
+        async with AsyncSession(engine) as db:
+            await run(db)
+        statements = list(captured)
+
+        scans = []
+        async with engine.connect() as conn:
+            for statement, parameters in statements:
+                scans.extend(await explain(conn, dialect, statement, parameters))
+            for table in scans:
+                if table not in table_rows:
+                    table_rows[table] = await conn.scalar(text(f"SELECT count(*) FROM {table}"))
+
+        allowed = ALLOWED_SCANS.get(name, {})
+        problems = [t for t in scans if t not in allowed and table_rows[t] >= args.min_rows]
+        notes = [f"{t} ({table_rows[t]} rows, {'allowed: ' + allowed[t] if t in allowed else 'below --min-rows'})" for t in scans if t not in problems]
+        if problems:
+            failures += 1
+            print(f"FAIL {name:<42} sequential scan on {', '.join(f'{t} ({table_rows[t]} rows)' for t in problems)}")
+        else:
+            print(f"ok   {name:<42} {len(statements)} statement(s)" + (f"; scans: {'; '.join(notes)}" if notes else ""))
+
+    await engine.dispose()
+    for name in missing:
+        print(f"FAIL {name:<42} no EXPLAIN case, add one to build_cases()")
+    return 1 if failures or missing else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN every DAL read query on a seeded database and fail on sequential scans")
+    parser.add_argument("--url", required=True, help="Database to migrate, seed and check (use a scratch database)")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--history", type=int, default=3, help="Inactive subscriptions per user")
+    parser.add_argument("--images", type=int, default=10, help="Image records per user")
+    parser.add_argument("--min-rows", type=int, default=1000, help="Ignore sequential scans on tables smaller than this")
+    parser.add_argument("--no-migrate", dest="migrate", action="store_false", help="Do not run alembic upgrade head first")
+    parser.add_argument("--no-seed", dest="seed", action="store_false", help="Check against the existing data")
+    args = parser.parse_args()
+    if args.migrate:
+        migrate(args.url)
+    sys.exit(asyncio.run(check(args)))
@@ -0,0 +1,232 @@
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+
+SCENARIOS = ["login", "dashboard", "upload", "admin"]
+DEFAULT_MIX = "login=1,dashboard=6,upload=1,admin=1"
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}', expected one of {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def install_fake_redis():
+    """Point CacheService at an in-process fakeredis server instead of a real Redis."""
+    import redis
+    import fakeredis
+    import fakeredis.aioredis
+    from redis import asyncio as aioredis
+
+    server = fakeredis.FakeServer()
+    connection_pool_class = aioredis.BlockingConnectionPool
+
+    class FakeConnectionPool(connection_pool_class):
+        def __init__(self, max_connections=50, timeout=20, **kwargs):
+            super().__init__(
+                connection_class=fakeredis.aioredis.FakeConnection,
+                max_connections=max_connections, timeout=timeout, server=server
+            )
+
+    class FakeControlClient(fakeredis.FakeRedis):
+        def __init__(self, decode_responses=False, **kwargs):
+            super().__init__(server=server, decode_responses=decode_responses)
+
+    aioredis.BlockingConnectionPool = FakeConnectionPool
+    redis.Redis = FakeControlClient
+
+
+def configure_environment(args):
+    if args.database_url is None:
+        args.database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='load-harness-'), 'harness.db')}"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("CACHE_WARMUP_ENABLED", "false")
+    if args.bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    if args.redis == "fake":
+        install_fake_redis()
+    elif args.redis == "none":
+        os.environ["REDIS_PORT"] = "1"
+
+
+async def seed(users: int, password: str) -> list[dict]:
+    from sqlalchemy import insert, select
+    from app.config.database import SessionLocal
+    from app.models.plan import Plan
+    from app.models.subscription import Subscription
+    from app.models.user import User
+    from app.utils.security import hash_password
+    from datetime import datetime, timedelta
+
+    hashed = await hash_password(password)
+    async with SessionLocal() as db:
+        if await db.scalar(select(User.id).limit(1)) is None:
+            await db.execute(insert(User), [
+                {"email": f"load{i}@example.com", "username": f"load{i}", "hashed_password": hashed,
+                 "role": "admin" if i == 0 else "user", "is_active": True}
+                for i in range(users)
+            ])
+            plan_id = await db.scalar(select(Plan.id).order_by(Plan.max_operations.desc()).limit(1))
+            now = datetime.now()
+            user_ids = (await db.scalars(select(User.id))).all()
+            await db.execute(insert(Subscription), [
+                {"user_id": user_id, "plan_id": plan_id, "operations_used": 0,
+                 "start_date": now, "end_date": now + timedelta(days=30), "is_active": True}
+                for user_id in user_ids
+            ])
+            await db.commit()
+        rows = (await db.execute(select(User.id, User.username, User.role).order_by(User.id))).all()
+    return [{"id": row.id, "username": row.username, "role": row.role} for row in rows]
+
+
+def sample_image(width: int, height: int) -> bytes:
+    from PIL import Image, ImageDraw
+    image = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    ImageDraw.Draw(image).ellipse((width // 4, height // 4, width * 3 // 4, height * 3 // 4), fill=(200, 80, 40))
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        self.samples.setdefault(endpoint, []).append(seconds)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+async def timed(recorder: Recorder, endpoint: str, request):
+    start = time.perf_counter()
+    try:
+        response = await request
+        ok = response.status_code < 400
+    except Exception:
+        ok = False
+    recorder.record(endpoint, time.perf_counter() - start, ok)
+
+
+async def run_scenario(name: str, client, users: list[dict], tokens: dict, password: str, image: bytes, recorder: Recorder):
+    user = random.choice(users[1:] or users)
+    headers = {"Authorization": f"Bearer {tokens[user['id']]}"}
+    if name == "login":
+        await timed(recorder, "POST /api/v1/auth/login", client.post(
+            "/api/v1/auth/login", data={"username": user["username"], "password": password}
+        ))
+    elif name == "dashboard":
+        await timed(recorder, "GET /api/v1/users/me", client.get("/api/v1/users/me", headers=headers))
+        await timed(recorder, "GET /api/v1/subscriptions/my-subscription", client.get("/api/v1/subscriptions/my-subscription", headers=headers))
+        await timed(recorder, "GET /api/v1/plans/", client.get("/api/v1/plans/", headers=headers))
+    elif name == "upload":
+        operation = random.choice(["grayscale", "resize", "rotate", "blur", "crop"])
+        await timed(recorder, f"POST /api/v1/images/process ({operation})", client.post(
+            "/api/v1/images/process",
+            headers=headers,
+            files={"file": ("load.png", image, "image/png")},
+            data={"operation": operation}
+        ))
+    elif name == "admin":
+        admin = users[0]
+        await timed(recorder, "GET /api/v1/users/", client.get(
+            "/api/v1/users/", params={"skip": random.randrange(0, max(1, len(users) - 50)), "limit": 50},
+            headers={"Authorization": f"Bearer {tokens[admin['id']]}"}
+        ))
+
+
+async def client_loop(client, mix: dict, deadline: float, *context):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < deadline:
+        await run_scenario(random.choices(names, weights)[0], client, *context)
+
+
+def report(recorder: Recorder, elapsed: float):
+    total = sorted(sample for samples in recorder.samples.values() for sample in samples)
+    errors = sum(recorder.errors.values())
+    print(f"\n{elapsed:.1f}s, {len(total)} requests, {errors} errors, {len(total) / elapsed:.1f} req/s")
+    print(f"{'endpoint':<48}{'requests':>9}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for endpoint, samples in sorted(recorder.samples.items()):
+        samples.sort()
+        print(
+            f"{endpoint:<48}{len(samples):>9}{len(samples) / elapsed:>8.1f}"
+            f"{percentile(samples, 0.5) * 1000:>9.1f}{percentile(samples, 0.95) * 1000:>9.1f}"
+            f"{percentile(samples, 0.99) * 1000:>9.1f}{recorder.errors.get(endpoint, 0):>8}"
+        )
+
+
+async def run(args):
+    import httpx
+    from app.main import app
+    from app.config.database import get_pool_stats
+    from app.utils.cache import cache_service
+    from app.utils.http_cache import response_cache
+    from app.utils.security import create_access_token
+
+    users = await seed(args.users, args.password)
+    tokens = {
+        user["id"]: create_access_token({"user_id": user["id"], "username": user["username"], "role": user["role"]})
+        for user in users
+    }
+    image = sample_image(args.image_width, args.image_height)
+
+    print(f"database {args.database_url}, redis {args.redis}, {len(users)} users, {args.clients} clients, mix {args.mix}")
+    async with app.router.lifespan_context(app):
+        # Startup configures logging, so the levels are set after it.
+        logging.getLogger("app").setLevel(args.log_level)
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://harness", timeout=args.timeout) as client:
+            context = (users, tokens, args.password, image, Recorder())
+            if args.warmup:
+                await asyncio.gather(*[run_scenario(name, client, *context[:-1], Recorder()) for name in args.mix])
+            started = time.perf_counter()
+            deadline = started + args.duration
+            await asyncio.gather(*[client_loop(client, args.mix, deadline, *context) for _ in range(args.clients)])
+            elapsed = time.perf_counter() - started
+        report(context[-1], elapsed)
+        print("\npool:", json.dumps(get_pool_stats()))
+        print("cache:", json.dumps(cache_service.stats(), default=str))
+        print("response cache:", json.dumps(response_cache.stats()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Boot the API in-process against SQLite and an in-memory Redis and run scripted load")
+    parser.add_argument("--database-url", help="Database to migrate and seed (default: a fresh SQLite file)")
+    parser.add_argument("--redis", choices=["fake", "none", "real"], default="fake",
+                        help="fake: in-memory fakeredis; none: run with the cache disabled; real: use REDIS_HOST/REDIS_PORT")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--password", default="load-test-password")
+    parser.add_argument("--bcrypt-rounds", type=int, help="Override BCRYPT_ROUNDS for seeding and logins")
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent simulated clients")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--image-width", type=int, default=640)
+    parser.add_argument("--image-height", type=int, default=480)
+    parser.add_argument("--log-level", default="WARNING", help="Level for the app loggers during the run")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false", help="Skip one untimed pass of each scenario")
+    args = parser.parse_args()
+    configure_environment(args)
+    from benchmarks.check_query_plans import migrate
+    migrate(args.database_url)
+    asyncio.run(run(args))
@@ -0,0 +1,85 @@
+"""Baseline schema: users, plans, subscriptions, image_records and the default plans
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19
+
+Databases created from schema.sql before migrations existed should be
+stamped instead of upgraded: `alembic stamp 0001_baseline`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("username", sa.String(length=100), nullable=False),
+        sa.Column("hashed_password", sa.String(length=255), nullable=False),
+        sa.Column("role", sa.String(length=20), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP(), server_default=sa.func.current_timestamp(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    plans = op.create_table(
+        "plans",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(length=20), nullable=False),
+        sa.Column("max_operations", sa.Integer(), nullable=False),
+        sa.Column("price", sa.Integer(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("is_deleted", sa.Boolean(), nullable=False),
+        sa.Column("deleted_at", sa.TIMESTAMP(), nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP(), server_default=sa.func.current_timestamp(), nullable=True),
+    )
+    op.create_index("ix_plans_id", "plans", ["id"])
+    op.create_index("ix_plans_name", "plans", ["name"], unique=True)
+
+    op.create_table(
+        "subscriptions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("plan_id", sa.Integer(), sa.ForeignKey("plans.id"), nullable=False),
+        sa.Column("operations_used", sa.Integer(), nullable=False),
+        sa.Column("start_date", sa.TIMESTAMP(), server_default=sa.func.current_timestamp(), nullable=True),
+        sa.Column("end_date", sa.TIMESTAMP(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_subscriptions_id", "subscriptions", ["id"])
+
+    op.create_table(
+        "image_records",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("filename", sa.String(length=255), nullable=False),
+        sa.Column("operation", sa.String(length=20), nullable=False),
+        sa.Column("original_size", sa.String(length=50), nullable=True),
+        sa.Column("processed_size", sa.String(length=50), nullable=True),
+        sa.Column("image_data", sa.LargeBinary(), nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP(), server_default=sa.func.current_timestamp(), nullable=True),
+    )
+    op.create_index("ix_image_records_id", "image_records", ["id"])
+
+    op.bulk_insert(plans, [
+        {"name": "FREE", "max_operations": 3, "price": 0, "is_deleted": False},
+        {"name": "BASIC", "max_operations": 50, "price": 999, "is_deleted": False},
+        {"name": "PREMIUM", "max_operations": 200, "price": 1999, "is_deleted": False},
+        {"name": "ENTERPRISE", "max_operations": 999999, "price": 4999, "is_deleted": False},
+    ])
+
+
+def downgrade():
+    op.drop_table("image_records")
+    op.drop_table("subscriptions")
+    op.drop_table("plans")
+    op.drop_table("users")
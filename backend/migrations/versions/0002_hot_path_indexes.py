@@ -0,0 +1,81 @@
+"""Indexes for the hot DAL queries and one active subscription per user
+
+Revision ID: 0002_hot_path_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-19
+
+- subscriptions(user_id, is_active): active subscription lookups and history
+- subscriptions(user_id) WHERE is_active: at most one active subscription per user
+- image_records(user_id, created_at): per-user image history, newest first
+- image_records(created_at): recently active users for the cache warm-up
+- plans(is_deleted): catalog listings without soft-deleted plans
+
+Users with several active subscriptions (possible before this revision)
+keep only the most recent one active. On PostgreSQL the indexes are built
+CONCURRENTLY so the tables stay writable during the upgrade.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_hot_path_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        """
+        UPDATE subscriptions SET is_active = false
+        WHERE is_active = true AND id NOT IN (
+            SELECT max(id) FROM subscriptions WHERE is_active = true GROUP BY user_id
+        )
+        """
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_subscriptions_user_id_is_active",
+            "subscriptions",
+            ["user_id", "is_active"],
+            if_not_exists=True,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            "uq_subscriptions_active_user",
+            "subscriptions",
+            ["user_id"],
+            unique=True,
+            postgresql_where=sa.text("is_active"),
+            sqlite_where=sa.text("is_active"),
+            if_not_exists=True,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            "ix_image_records_user_id_created_at",
+            "image_records",
+            ["user_id", "created_at"],
+            if_not_exists=True,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            "ix_image_records_created_at",
+            "image_records",
+            ["created_at"],
+            if_not_exists=True,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            "ix_plans_is_deleted",
+            "plans",
+            ["is_deleted"],
+            if_not_exists=True,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    op.drop_index("ix_plans_is_deleted", table_name="plans")
+    op.drop_index("ix_image_records_created_at", table_name="image_records")
+    op.drop_index("ix_image_records_user_id_created_at", table_name="image_records")
+    op.drop_index("uq_subscriptions_active_user", table_name="subscriptions")
+    op.drop_index("ix_subscriptions_user_id_is_active", table_name="subscriptions")
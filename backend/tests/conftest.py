@@ -0,0 +1,18 @@
+import fakeredis
+import fakeredis.aioredis
+import pytest
+from app.utils.cache import CacheService
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def cache(redis_server):
+    """A CacheService backed by an in-process fakeredis server instead of a real Redis."""
+    service = CacheService()
+    service.redis_client = fakeredis.aioredis.FakeRedis(server=redis_server)
+    service.control_client = fakeredis.FakeRedis(server=redis_server)
+    return service
@@ -0,0 +1,217 @@
+import asyncio
+import fakeredis
+import fakeredis.aioredis
+import pytest
+from prometheus_client import REGISTRY
+from redis import asyncio as aioredis
+from app.config.settings import settings
+from app.utils.cache import CacheService, PoolExhaustedError, _CountingConnectionPool
+
+
+def run(coroutine, timeout: float = 5.0):
+    return asyncio.run(asyncio.wait_for(coroutine, timeout))
+
+
+def colliding_user_id(stripes: int = 64) -> int:
+    """A user id whose two profile keys fell on the same lock stripe when single flight used hash(key) % 64."""
+    return next(
+        user_id for user_id in range(1, 100000)
+        if hash(f"user:with_subscription:{user_id}") % stripes == hash(f"user:id:{user_id}") % stripes
+    )
+
+
+def test_get_or_compute_nested_keys_do_not_wait_on_each_other(cache):
+    user_id = colliding_user_id()
+
+    async def scenario():
+        async def load_user():
+            return {"id": user_id}
+
+        async def load_user_with_subscription():
+            user = await cache.get_or_compute(f"user:id:{user_id}", load_user)
+            return {**user, "current_plan": "FREE"}
+
+        return await cache.get_or_compute(f"user:with_subscription:{user_id}", load_user_with_subscription)
+
+    assert run(scenario()) == {"id": user_id, "current_plan": "FREE"}
+
+
+def test_get_or_compute_concurrent_nested_fills(cache):
+    async def scenario():
+        both_computing = asyncio.Barrier(2)
+
+        def nested(user_id: int):
+            async def load_user():
+                return {"id": user_id}
+
+            async def load():
+                await both_computing.wait()
+                return await cache.get_or_compute(f"user:id:{user_id}", load_user)
+
+            return cache.get_or_compute(f"user:with_subscription:{user_id}", load)
+
+        return await asyncio.gather(nested(1), nested(2))
+
+    assert run(scenario()) == [{"id": 1}, {"id": 2}]
+
+
+def test_get_or_compute_runs_compute_once_for_concurrent_misses(cache):
+    calls = []
+
+    async def scenario():
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "value"
+
+        return await asyncio.gather(*[cache.get_or_compute("plans", load) for _ in range(20)])
+
+    assert run(scenario()) == ["value"] * 20
+    assert len(calls) == 1
+
+
+def test_get_or_compute_waiters_recompute_after_a_failed_fill(cache):
+    calls = []
+
+    async def scenario():
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            if len(calls) == 1:
+                raise RuntimeError("database unavailable")
+            return "value"
+
+        return await asyncio.gather(*[cache.get_or_compute("plans", load) for _ in range(3)], return_exceptions=True)
+
+    results = run(scenario())
+    assert isinstance(results[0], RuntimeError)
+    assert results[1:] == ["value", "value"]
+    assert len(calls) == 2
+
+
+def test_delete_that_fails_before_the_breaker_opens_is_retried(cache, redis_server, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_BREAKER_PROBE_INTERVAL", 0.05)
+
+    async def scenario():
+        await cache.set("user:id:1", {"id": 1})
+        redis_server.connected = False
+        assert await cache.delete("user:id:1") is False
+        assert cache.enabled
+        redis_server.connected = True
+        await asyncio.sleep(0.2)
+        return await cache.redis_client.exists("user:id:1")
+
+    assert run(scenario()) == 0
+    assert cache.stats()["deferred_invalidations"] == 0
+
+
+def test_dropped_invalidations_flush_the_cache_on_recovery(cache, redis_server, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_BREAKER_PROBE_INTERVAL", 0.05)
+    monkeypatch.setattr(settings, "CACHE_MAX_DEFERRED_INVALIDATIONS", 1)
+
+    async def scenario():
+        await cache.set("user:id:1", {"id": 1})
+        await cache.set("user:id:2", {"id": 2})
+        redis_server.connected = False
+        await cache.delete("user:id:1")
+        await cache.delete("user:id:2")
+        assert cache.stats()["dropped_invalidations"] == 1
+        redis_server.connected = True
+        await asyncio.sleep(0.2)
+        return await cache.redis_client.exists("user:id:1", "user:id:2")
+
+    assert run(scenario()) == 0
+    assert cache.stats()["dropped_invalidations"] == 0
+
+
+def test_full_connection_pool_waits_instead_of_failing(redis_server):
+    service = CacheService()
+    service.connection_pool = _CountingConnectionPool(
+        connection_class=fakeredis.aioredis.FakeConnection, server=redis_server, max_connections=2, timeout=1
+    )
+    service.redis_client = aioredis.Redis(connection_pool=service.connection_pool)
+    errors = []
+    service._record_error = errors.append
+
+    async def scenario():
+        return await asyncio.gather(*(service.get(f"plan:{plan_id}") for plan_id in range(50)))
+
+    assert run(scenario()) == [None] * 50
+    assert service.connection_pool.peak_in_use <= 2
+    assert errors == []
+
+
+def test_connection_pool_timeout_does_not_open_the_breaker(redis_server):
+    service = CacheService()
+    service.connection_pool = _CountingConnectionPool(
+        connection_class=fakeredis.aioredis.FakeConnection, server=redis_server, max_connections=1, timeout=0.01
+    )
+    service.redis_client = aioredis.Redis(connection_pool=service.connection_pool)
+
+    async def scenario():
+        held = await service.connection_pool.get_connection()
+        try:
+            with pytest.raises(PoolExhaustedError):
+                await service.connection_pool.get_connection()
+            for _ in range(settings.CACHE_BREAKER_FAILURE_THRESHOLD + 1):
+                assert await service.get("plans:all") is None
+        finally:
+            await service.connection_pool.release(held)
+
+    run(scenario())
+    assert service.breaker.stats()["state"] == "closed"
+
+
+def test_breaker_state_changes_are_exported(cache):
+    def sample(name):
+        return REGISTRY.get_sample_value(name, {"breaker": "redis"}) or 0.0
+
+    opens = sample("circuit_breaker_opens_total")
+    degraded = sample("circuit_breaker_degraded_seconds_total")
+    cache.breaker.probe = lambda: False
+    cache.breaker.open()
+    assert sample("circuit_breaker_open") == 1
+    assert sample("circuit_breaker_opens_total") == opens + 1
+    cache.breaker.close()
+    assert sample("circuit_breaker_open") == 0
+    assert sample("circuit_breaker_degraded_seconds_total") > degraded
+
+
+def test_every_lookup_is_counted_once(cache):
+    def lookups(namespace, result):
+        return REGISTRY.get_sample_value("cache_lookups_total", {"namespace": namespace, "result": result}) or 0.0
+
+    async def compute():
+        return {"name": "FREE"}
+
+    async def scenario():
+        await cache.get_or_compute("plan:id:1", compute)
+        await cache.get_or_compute("plan:id:1", compute)
+        await cache.get("plan:id:2")
+        await cache.get_many(["plan:id:1", "plan:id:3"])
+        await cache.get_version("plans")
+
+    before = {result: lookups("plan", result) for result in ("hit", "miss")}
+    versions = lookups("version", "miss")
+    run(scenario())
+    assert lookups("plan", "hit") - before["hit"] == 2
+    assert lookups("plan", "miss") - before["miss"] == 3
+    assert lookups("version", "miss") - versions == 1
+
+
+def test_catalog_version_never_repeats_after_a_flush(cache, redis_server):
+    async def scenario():
+        first = await cache.get_version("plans")
+        bumped = await cache.bump_version("plans")
+        await cache.redis_client.flushdb()
+        after_flush = await cache.bump_version("plans")
+        return first, bumped, after_flush
+
+    first, bumped, after_flush = run(scenario())
+    assert bumped == first + 1
+    assert after_flush > bumped
+
+
+def test_catalog_version_is_unknown_while_redis_fails(cache, redis_server):
+    redis_server.connected = False
+    assert run(cache.get_version("plans")) is None
@@ -0,0 +1,33 @@
+import asyncio
+from app.config.settings import settings
+from app.utils.concurrency import ConcurrencyLimitMiddleware
+
+
+def test_requests_beyond_the_limit_wait_and_probes_do_not(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_CONCURRENT_REQUESTS", 2)
+    running = 0
+    peak = 0
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        if scope["path"] != "/health":
+            await release.wait()
+        running -= 1
+
+    middleware = ConcurrencyLimitMiddleware(app)
+
+    async def request(path: str):
+        await middleware({"type": "http", "path": path}, None, None)
+
+    async def scenario():
+        requests = [asyncio.create_task(request("/api/v1/plans/")) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(request("/health"), 1)
+        release.set()
+        await asyncio.gather(*requests)
+
+    asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert peak == 3
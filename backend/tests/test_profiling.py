@@ -0,0 +1,75 @@
+import asyncio
+import cProfile
+import pstats
+import threading
+import time
+from app.utils.profiling import StackSampler, _OwnSteps
+
+
+def request_work():
+    time.sleep(0.002)
+
+
+def other_work():
+    time.sleep(0.002)
+
+
+async def run_alongside_other_task(enter, leave):
+    async def request():
+        for _ in range(5):
+            request_work()
+            await asyncio.sleep(0)
+        return "done"
+
+    async def other():
+        for _ in range(5):
+            other_work()
+            await asyncio.sleep(0)
+
+    other_task = asyncio.create_task(other())
+    result = await _OwnSteps(request(), enter, leave)
+    await other_task
+    return result
+
+
+def test_pstats_profile_leaves_out_concurrent_tasks():
+    profiler = cProfile.Profile()
+    assert asyncio.run(run_alongside_other_task(profiler.enable, profiler.disable)) == "done"
+    functions = {name for _, _, name in pstats.Stats(profiler).stats}
+    assert "request_work" in functions
+    assert "other_work" not in functions
+
+
+def test_sampler_leaves_out_concurrent_tasks():
+    sampler = StackSampler(threading.get_ident(), 0.0005)
+    sampler.start()
+    try:
+        asyncio.run(run_alongside_other_task(sampler.resume, sampler.pause))
+    finally:
+        sampler.stop()
+    collapsed = sampler.collapsed()
+    assert "request_work" in collapsed
+    assert "other_work" not in collapsed
+
+
+def test_cancellation_reaches_the_request():
+    cleaned_up = []
+
+    async def request():
+        try:
+            await asyncio.sleep(10)
+        finally:
+            cleaned_up.append(True)
+
+    async def scenario():
+        task = asyncio.create_task(profiled(request()))
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return task.cancelled()
+
+    async def profiled(coroutine):
+        return await _OwnSteps(coroutine, lambda: None, lambda: None)
+
+    assert asyncio.run(scenario())
+    assert cleaned_up == [True]
@@ -0,0 +1,15 @@
+import asyncio
+from app.config.settings import settings
+from app.utils.security import hash_password, verify_password
+
+
+def test_password_hashing_works_across_event_loops(monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+
+    async def scenario():
+        hashes = await asyncio.gather(*(hash_password("secret1") for _ in range(settings.PASSWORD_HASH_MAX_PENDING + 4)))
+        return await verify_password("secret1", hashes[0])
+
+    # Enough concurrent hashes to wait on the semaphore, in two loops, as separate test clients or workers do.
+    assert asyncio.run(scenario())
+    assert asyncio.run(scenario())
@@ -0,0 +1,24 @@
+from prometheus_client import REGISTRY
+from app.utils.token_cache import TokenCache
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_lookups_and_removals_are_exported():
+    cache = TokenCache(max_size=1)
+    hits, misses = _sample("token_cache_lookups_total", result="hit"), _sample("token_cache_lookups_total", result="miss")
+    evictions, flushes = _sample("token_cache_removals_total", reason="eviction"), _sample("token_cache_removals_total", reason="flush")
+
+    assert cache.get("a", "secret") is None
+    cache.set("a", {"sub": "alice"}, "secret")
+    assert cache.get("a", "secret") == {"sub": "alice"}
+    cache.set("b", {"sub": "bob"}, "secret")
+    cache.clear()
+
+    assert _sample("token_cache_lookups_total", result="hit") - hits == cache.hits == 1
+    assert _sample("token_cache_lookups_total", result="miss") - misses == cache.misses == 1
+    assert _sample("token_cache_removals_total", reason="eviction") - evictions == cache.evictions == 1
+    assert _sample("token_cache_removals_total", reason="flush") - flushes == 1
+    assert _sample("token_cache_size") == 0
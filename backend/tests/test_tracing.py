@@ -0,0 +1,42 @@
+import asyncio
+import httpx
+from fastapi import APIRouter, FastAPI
+from app.config.settings import settings
+from app.utils import tracing
+
+
+class RecordingExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, trace):
+        self.traces.append(trace)
+
+
+def test_controller_handlers_get_their_own_span(monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+    monkeypatch.setattr(settings, "TRACING_SAMPLE_RATE", 1.0)
+    exporter = RecordingExporter()
+    monkeypatch.setattr(tracing, "_exporter", exporter)
+
+    router = APIRouter(prefix="/items", route_class=tracing.TracedRoute)
+
+    @router.get("/{item_id}")
+    async def get_item(item_id: int):
+        with tracing.span("ItemService.get"):
+            return {"id": item_id}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.add_middleware(tracing.TracingMiddleware)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get("/api/items/7")
+
+    assert asyncio.run(scenario()).json() == {"id": 7}
+    spans = {span.name: span for span in exporter.traces[0].spans}
+    handler = spans[f"{__name__.rpartition('.')[2]}.get_item"]
+    assert handler.parent_id == spans["GET /api/items/{item_id}"].span_id
+    assert spans["ItemService.get"].parent_id == handler.span_id
+    assert len(exporter.traces[0].spans) == 3